@@ -1,16 +1,35 @@
 import streamlit as st
 import pandas as pd
+import io
 import os
-import easyocr
-from deep_translator import GoogleTranslator
-import requests
-import wikipedia
+import threading
 import datetime
 import plotly.express as px
+import plotly.graph_objects as go
 import datetime
 import pytz
 import numpy as np
 import matplotlib.pyplot as plt
+from fetch_cache import WikipediaClient
+from ncbi_client import NCBIClient
+from ocr_engine import OCRService, OCRTextStore, batch_ocr
+from image_pipeline import (CANNY_SIGMA, OBJECT_FIELDS, TIFF_DATA_DIR, analyze_stack, preview as image_preview,
+                            resolve_data_path, store_upload)
+from live_knowledge import LiveKnowledgeBase
+from pockets import find_pockets
+from protein_props import protein_properties
+from structure_store import StructureFetchError, StructureNotFound, StructureStore
+from text_match import KeywordTagger
+from translation import TranslationService
+from unified_search import NCBI_DATABASES, build_sources, fan_out
+from seq_io import clean_dna, iter_records, read_record, summarize_records, transcribe
+from seq_batch import SCALAR_FIELDS, iter_metrics, write_csv
+from mutagenesis import simulate_mutants
+from seq_core import SequenceProfile, encode
+from downsample import MAX_PLOT_POINTS, decimate
+from primers import (cross_dimer_dg, find_amplicons, gc_percent, hairpin_dg, melting_temperatures,
+                     read_plate, screen_pairs, self_dimer_dg)
+from restriction import LADDER_1KB, DigestScanner, digest, gel_migration, load_enzymes
 # ==========================================
 # 1. AUTO-ADAPTING UI (MOBILE + DESKTOP)
 # ==========================================
@@ -172,46 +191,79 @@ with st.sidebar:
 # =========================
 # OCR INITIALIZATION
 # =========================
+# The EasyOCR model is no longer built at import time: the service loads it
+# on first use, or in a background thread started once the page has rendered.
 @st.cache_resource
 def load_ocr():
-    return easyocr.Reader(['en'])
+    return OCRService(['en'])
 
-reader = load_ocr()
+# Diagram text survives restarts in cache/ocr_index.json (see `python ocr_engine.py`)
+@st.cache_resource
+def load_ocr_store():
+    return OCRTextStore()
 
-@st.cache_data
-def get_text_from_image(img_path):
-    if img_path and os.path.exists(img_path):
-        try:
-            text = reader.readtext(img_path, detail=0)
-            return " ".join(text).lower()
-        except Exception:
-            return ""
-    return ""
+ocr = load_ocr()
+ocr_store = load_ocr_store()
 
 # =========================
 # LOAD KNOWLEDGE BASE
 # =========================
-@st.cache_data
-def load_knowledge_base():
-    # Looking for either filename
-    for file in ["knowledge_base.csv", "knowledge.csv"]:
-        if os.path.exists(file):
-            try:
-                df = pd.read_csv(file)
-                df.columns = df.columns.str.strip()
-                df = df.dropna(how='all')
-                return df
-            except Exception:
-                continue
-    return pd.DataFrame(columns=["Topic", "Section", "Explanation", "Image", "Ten_Points", "Detailed_Explanation"])
+# The knowledge base and its derived search state live in one shared object.
+# It is served from the compiled Parquet artifact (cache/knowledge_base.parquet)
+# and a watcher reloads it in place when the CSV changes, recomputing OCR text
+# and search entries only for the rows that were edited.
+def stored_ocr_text(img_path):
+    if not img_path or not os.path.exists(img_path):
+        return ""
+    return ocr_store.lookup(img_path)
+
+# Reader auto-tags come from the bio_keywords.txt vocabulary and are computed
+# per row at load time, not on every page render.
+@st.cache_resource
+def load_live_knowledge_base():
+    kb = LiveKnowledgeBase(ocr_lookup=stored_ocr_text, tagger=KeywordTagger.from_file())
+    kb.watch()
+    return kb
+
+live_kb = load_live_knowledge_base()
+knowledge_df = live_kb.df
 
-knowledge_df = load_knowledge_base()
+# Diagrams missing from the OCR store are OCR'd by a background batch job and
+# then re-indexed, so no search request ever waits on EasyOCR. OCR_WORKERS > 1
+# spreads the batch over a process pool; the default reuses the warmed model.
+OCR_WORKERS = int(os.environ.get("OCR_WORKERS", "1"))
+
+@st.cache_resource
+def ocr_backfill_state():
+    return {"thread": None, "done": 0, "total": 0}
+
+def backfill_pending_ocr(state):
+    def report(done, total, img_path):
+        state["done"], state["total"] = done, total
+        text = stored_ocr_text(img_path)
+        if text is not None:
+            live_kb.update_ocr(img_path, text)
+
+    try:
+        for img_path in batch_ocr(live_kb.pending_ocr_images(), ocr_store, workers=OCR_WORKERS, service=ocr, progress=report):
+            live_kb.update_ocr(img_path, "")
+    finally:
+        state["thread"] = None
+
+def start_ocr_backfill():
+    state = ocr_backfill_state()
+    if state["thread"] is None and live_kb.pending_ocr_images():
+        state["thread"] = threading.Thread(target=backfill_pending_ocr, args=(state,), name="ocr-backfill", daemon=True)
+        state["thread"].start()
+    return state
 
 # =========================
 # SESSION STATE
 # =========================
 if "page_index" not in st.session_state:
     st.session_state.page_index = 0
+# A hot reload may have removed pages since this session's last run
+st.session_state.page_index = max(0, min(st.session_state.page_index, len(knowledge_df) - 1))
 
 # =========================
 # TABS
@@ -383,12 +435,8 @@ with tabs[1]:
         st.header(row.get("Topic", "Untitled"))
         
         # --- NEW: AUTO-TAG GENERATOR ---
-        # This logic simulates NLP entity extraction
-        bio_keywords = ["DNA", "RNA", "Protein", "CRISPR", "Gene", "Cell", "Enzyme", "Mutation", "Pathway", "Genomics"]
-        text_content = str(row.get("Explanation", "")) + " " + str(row.get("Detailed_Explanation", ""))
-        
-        # Find which keywords are in the text
-        found_tags = [tag for tag in bio_keywords if tag.lower() in text_content.lower()]
+        # Tags are extracted once per row when the knowledge base loads
+        found_tags = list(row.get("Tags", []))
         
         if found_tags:
             tag_html = ""
@@ -402,7 +450,8 @@ with tabs[1]:
         st.write(row.get("Explanation", "No explanation available."))
         
         with st.expander("📘 Detailed Analysis & Mechanism"):
-            st.write(row.get("Detailed_Explanation", "No extra details available."))
+            details = row.get("Detailed_Explanation")
+            st.write(details if isinstance(details, str) and details else "No extra details available.")
         if st.button("Add to Research Report", icon="➕", use_container_width=False):
                 if 'report_list' not in st.session_state:
                     st.session_state['report_list'] = []
@@ -439,16 +488,19 @@ with tabs[2]:
         # --- NEW: STUDY MODE TOGGLE ---
         study_mode = st.toggle("Enable Study Mode (Hide Notes)", value=False)
         
-        pts = current_row.get('Ten_Points') or current_row.get('10_Points') or "No points available."
+        # Ten_Points arrives pre-split into a list from the compiled knowledge base
+        points = list(current_row.get('Ten_Points', []))
+        pts = "\n\n".join(points) if points else "No points available."
+        pts_md = "\n".join(f"{n}. {p}" for n, p in enumerate(points, 1)) if points else pts
         
         if study_mode:
             st.warning("🙈 **Study Mode Active:** Try to recall the key points about this topic before revealing them!")
             if st.button("👁️ Reveal Notes for 10 Seconds"):
-                st.write(pts)
+                st.markdown(pts_md)
         else:
             # Standard View
             st.success("📝 **Full Notes:**")
-            st.write(pts)
+            st.markdown(pts_md)
         
         st.divider()
         # --- CITATION & DOWNLOAD ---
@@ -460,7 +512,7 @@ with tabs[2]:
         with col_dl:
             st.download_button(
                 label="📥 Download Study Notes",
-                data=str(pts),
+                data=pts,
                 file_name=f"{current_row.get('Topic', 'Bio_Notes')}_Notes.txt",
                 mime="text/plain",
                 use_container_width=True
@@ -471,13 +523,57 @@ with tabs[2]:
 # =========================
 # TAB 3: 🧪 DNA LAB (Previously tabs[2])
 # =========================
+LAB_PREVIEW_BASES = 5000
+
+# Record names/lengths of an uploaded file, computed once per upload
+@st.cache_data(max_entries=4)
+def summarize_upload(file_id, _data):
+    return summarize_records(_data)
+
+# Batch metrics of an uploaded file, computed once per upload (scalars only)
+@st.cache_data(max_entries=4)
+def batch_metrics(file_id, _data):
+    return pd.DataFrame(list(iter_metrics(iter_records(_data), workers=1, include_sequences=False)), columns=SCALAR_FIELDS)
+
+# Full CSV including mRNA / protein, only built when requested
+@st.cache_data(max_entries=2)
+def batch_sequences_csv(file_id, _data):
+    out = io.StringIO()
+    write_csv(iter_metrics(iter_records(_data), workers=1), out)
+    return out.getvalue()
+
 with tabs[3]:
     st.header("🧪 DNA Interactive Lab")
     st.info("Transform and prepare your genomic sequences for analysis.")
     
-    # Input Section
-    raw_input = st.text_area("Enter Raw DNA (can include spaces/numbers):", "atgc 123 gtatc", key="lab_input")
-    
+    # Input Section: pasted text, or a (gzipped) FASTA/FASTQ file streamed record by record
+    input_mode = st.radio("Input source", ["✍️ Paste sequence", "📁 Upload FASTA/FASTQ"], horizontal=True, key="lab_mode")
+    raw_input = ""
+    uploaded = None
+    record_choice = 0
+    if input_mode == "✍️ Paste sequence":
+        raw_input = st.text_area("Enter Raw DNA (can include spaces/numbers):", "atgc 123 gtatc", key="lab_input")
+    else:
+        uploaded = st.file_uploader("FASTA / FASTQ file (plain or gzipped)", type=["fa", "fasta", "fna", "fq", "fastq", "gz", "txt"], key="lab_upload")
+        if uploaded is not None:
+            try:
+                records = summarize_upload(uploaded.file_id, uploaded.getvalue())
+            except ValueError as e:
+                st.error(f"Could not parse file: {e}")
+                records = []
+            if records:
+                st.caption(f"{len(records):,} record(s), {sum(n for _, n in records):,} bases after cleaning")
+                record_choice = st.selectbox(
+                    "Record", range(len(records)), key="lab_record",
+                    format_func=lambda i: f"{records[i][0] or f'Record {i+1}'} ({records[i][1]:,} bp)"
+                )
+
+    def lab_sequence():
+        # Cleaned once per button press via a translation table (see seq_io)
+        if uploaded is None:
+            return clean_dna(raw_input)
+        return read_record(uploaded.getvalue(), record_choice)[1].decode("ascii")
+
     # Action Buttons in a nice row
     c1, c2, c3 = st.columns(3)
     
@@ -487,27 +583,23 @@ with tabs[3]:
     label = ""
 
     if c1.button("🧹 Clean Sequence", use_container_width=True):
-        result_text = "".join([char for char in raw_input if char.upper() in "ATGC"]).upper()
+        result_text = lab_sequence()
         result_type = "success"
         label = "Cleaned DNA Sequence:"
 
     if c2.button("🧬 Transcribe", use_container_width=True):
-        cleaned = "".join([char for char in raw_input if char.upper() in "ATGC"]).upper()
-        result_text = cleaned.replace("T", "U")
+        result_text = transcribe(lab_sequence())
         result_type = "warning"
         label = "mRNA Transcript (T → U):"
 
     if c3.button("🎲 Random Mutation", use_container_width=True):
-        cleaned = "".join([char for char in raw_input if char.upper() in "ATGC"]).upper()
+        cleaned = lab_sequence()
         if cleaned:
-            import random
-            list_seq = list(cleaned)
-            idx = random.randint(0, len(list_seq)-1)
-            old, new = list_seq[idx], random.choice([b for b in "ATGC" if b != list_seq[idx]])
-            list_seq[idx] = new
-            result_text = "".join(list_seq)
+            mutant = simulate_mutants(cleaned, n_mutations=1)
+            event = mutant.event_rows()[0]
+            result_text = mutant.sequences[0]
             result_type = "error"
-            label = f"Mutation Alert: Position {idx} changed from {old} to {new}"
+            label = f"Mutation Alert: Position {event['Position'] - 1} changed from {event['Ref']} to {event['Alt']}"
 
     # SHOW RESULTS HERE (Below the buttons, full width)
     if result_text:
@@ -515,8 +607,61 @@ with tabs[3]:
         if result_type == "success": st.success(label)
         elif result_type == "warning": st.warning(label)
         elif result_type == "error": st.error(label)
-        st.code(result_text)
-        st.caption("Copy this sequence for use in the Advanced Molecular Suite.")
+        # Whole genomes are offered as a download; rendering them would freeze the page
+        if len(result_text) > LAB_PREVIEW_BASES:
+            st.code(result_text[:LAB_PREVIEW_BASES] + " ...")
+            st.caption(f"Showing the first {LAB_PREVIEW_BASES:,} of {len(result_text):,} bases.")
+            st.download_button("📥 Download Full Sequence", data=result_text, file_name="lab_sequence.txt", mime="text/plain", key="lab_download")
+        else:
+            st.code(result_text)
+            st.caption("Copy this sequence for use in the Advanced Molecular Suite.")
+
+    # Mutant library: many substitutions/indels across many replicates in one vectorized call
+    with st.expander("🧫 Mutant Library Simulator"):
+        m1, m2, m3 = st.columns(3)
+        mut_mode = m1.radio("Mutations per replicate", ["Per-base rate", "Fixed count"], key="mut_mode")
+        if mut_mode == "Per-base rate":
+            mut_rate = m1.number_input("Rate (per base)", min_value=0.0, max_value=1.0, value=0.01, step=0.001, format="%.4f", key="mut_rate")
+            mut_count = None
+        else:
+            mut_count = m1.number_input("Mutations", min_value=1, value=3, step=1, key="mut_count")
+            mut_rate = None
+        mut_replicates = m2.number_input("Replicates", min_value=1, max_value=100_000, value=100, step=10, key="mut_reps")
+        mut_indels = m2.slider("Indel fraction", 0.0, 1.0, 0.0, 0.05, key="mut_indels")
+        mut_ts = m3.slider("Transition probability", 0.0, 1.0, 1 / 3, 0.01, key="mut_ts",
+                           help="Share of substitutions that are transitions (1/3 = uniform)")
+        mut_seed = m3.number_input("Seed", min_value=0, value=42, step=1, key="mut_seed")
+
+        if st.button("🧬 Generate Mutant Library", key="mut_run"):
+            cleaned = lab_sequence()
+            library = None
+            if not cleaned:
+                st.warning("Enter or upload a sequence first.")
+            else:
+                try:
+                    library = simulate_mutants(
+                        cleaned, replicates=int(mut_replicates), rate=mut_rate,
+                        n_mutations=None if mut_count is None else int(mut_count),
+                        indel_fraction=mut_indels, transition_prob=mut_ts, seed=int(mut_seed),
+                    )
+                except ValueError as e:
+                    st.error(str(e))
+                    library = None
+            if library is not None:
+                summary = library.summary()
+                s1, s2, s3, s4 = st.columns(4)
+                s1.metric("Mutations", f"{summary['mutations']:,}")
+                s2.metric("Transitions", f"{summary['transitions']:,}")
+                s3.metric("Transversions", f"{summary['transversions']:,}")
+                s4.metric("Ts/Tv", f"{summary['ts_tv_ratio']:.2f}")
+                st.caption(f"{summary['substitutions']:,} substitutions, {summary['insertions']:,} insertions, {summary['deletions']:,} deletions across {summary['replicates']:,} replicates.")
+                # Only the previewed slice of the event arrays becomes a DataFrame
+                events = pd.DataFrame(library.event_columns(LAB_PREVIEW_BASES))
+                if not events.empty:
+                    st.dataframe(events, hide_index=True, use_container_width=True)
+                    if summary["mutations"] > len(events):
+                        st.caption(f"Showing the first {len(events):,} of {summary['mutations']:,} events.")
+                st.download_button("📥 Download Mutants (FASTA)", data=library.to_fasta(), file_name="mutant_library.fasta", mime="text/plain", key="mut_download")
 
     st.divider()
     
@@ -539,83 +684,131 @@ with tabs[4]:
     # Search input
     query = st.text_input("Enter a term to search (e.g., 'DNA', 'Polymerase')...")
     
+    # Diagrams that are not in the OCR store yet are indexed in the background
+    if live_kb.pending_ocr_images():
+        backfill = start_ocr_backfill()
+        if backfill["total"]:
+            st.caption(f"⏳ Indexing diagram labels in the background ({backfill['done']}/{backfill['total']}); they will appear in results shortly.")
+        else:
+            st.caption("⏳ Indexing diagram labels in the background; they will appear in results shortly.")
+
     if query:
-        query_lower = query.lower()
-        found = False
-        
-        # Loop through the dataframe
-        for i, r in knowledge_df.iterrows():
-            # 1. Check Text (using 'Topic' and 'Explanation' columns)
-            # We use .get() to prevent crashes if a column is missing
-            topic_val = str(r.get('Topic', '')).lower()
-            expl_val = str(r.get('Explanation', '')).lower()
-            
-            txt_match = query_lower in topic_val or query_lower in expl_val
-            
-            # 2. Check Image via OCR
+        # Ranked whole-term hits first, then rows that only match as a substring
+        # Rows come from the same snapshot as the hit positions (a reload may land mid-run)
+        search_df, results = live_kb.search_rows(query)
+
+        for i, ocr_match, txt_match in results:
+            r = search_df.iloc[i]
             img_path = str(r.get('Image', ''))
-            img_text = ""
-            if img_path and img_path != 'nan':
-                img_text = get_text_from_image(img_path).lower()
-            
-            ocr_match = query_lower in img_text
-            
-            # If we find a match in either Text or OCR
-            if txt_match or ocr_match:
-                found = True
-                with st.expander(f"📖 {r.get('Topic', 'Untitled')} (Page {i+1})", expanded=True):
-                    col_text, col_img = st.columns([2, 1])
-                    
-                    with col_text:
-                        if txt_match:
-                            st.markdown("🎯 **Found in Text**")
-                        if ocr_match:
-                            st.markdown("👁️ **Found in Diagram (OCR)**")
-                        
-                        # Show a preview of the explanation
-                        preview_text = str(r.get('Explanation', 'No content available'))
-                        st.write(preview_text[:300] + "...") 
-                        
-                        # Button to jump to the Reader tab
-                        if st.button(f"Go to Page {i+1}", key=f"search_btn_{i}"):
-                            st.session_state.page_index = i
-                            # This ensures the app switches focus to the reader's index
-                            st.rerun()
-                            
-                    with col_img:
-                        if img_path and os.path.exists(img_path):
-                            st.image(img_path, caption="Related Diagram", use_container_width=True)
-                        else:
-                            st.caption("No image available")
-                            
-        if not found:
+
+            with st.expander(f"📖 {r.get('Topic', 'Untitled')} (Page {i+1})", expanded=True):
+                col_text, col_img = st.columns([2, 1])
+
+                with col_text:
+                    if txt_match:
+                        st.markdown("🎯 **Found in Text**")
+                    if ocr_match:
+                        st.markdown("👁️ **Found in Diagram (OCR)**")
+
+                    # Show a preview of the explanation
+                    preview_text = str(r.get('Explanation', 'No content available'))
+                    st.write(preview_text[:300] + "...")
+
+                    # Button to jump to the Reader tab
+                    if st.button(f"Go to Page {i+1}", key=f"search_btn_{i}"):
+                        st.session_state.page_index = i
+                        # This ensures the app switches focus to the reader's index
+                        st.rerun()
+
+                with col_img:
+                    if img_path and os.path.exists(img_path):
+                        st.image(img_path, caption="Related Diagram", use_container_width=True)
+                    else:
+                        st.caption("No image available")
+
+        if not results:
             st.warning(f"No results found for '{query}'. Try checking the 'Global Bio-Search' tab!")
 
 # =========================
 # TAB 5: GLOBAL BIO-SEARCH
 # =========================
+@st.cache_resource
+def load_wiki_client():
+    # Shared session + persistent TTL cache for every rerun and user
+    return WikipediaClient()
+
+
+@st.cache_resource
+def load_ncbi_client():
+    # One pooled session and one token bucket for all sessions, so the whole app stays under NCBI's limit
+    return NCBIClient()
+
+
+wiki_client = load_wiki_client()
+ncbi_client = load_ncbi_client()
+
 with tabs[5]:
     st.header("🌐 Global Bio-Intelligence")
     st.caption("Search results are now matched for accuracy (Google-style logic)")
     
+    # One query to every source at once; each panel fills in as its source answers
+    st.subheader("🔎 Unified Search")
+    unified_query = st.text_input("Search the textbook, Wikipedia and NCBI together:", key="unified_query")
+    if unified_query:
+        unified_sources = build_sources(unified_query, kb=live_kb, wiki=wiki_client, ncbi=ncbi_client)
+        source_labels = {"textbook": "📖 Textbook", "wikipedia": "📚 Wikipedia",
+                         **{f"ncbi:{db}": f"🔬 NCBI {db}" for db in NCBI_DATABASES}}
+        panels = {}
+        for name in unified_sources:
+            panels[name] = st.empty()
+            panels[name].info(f"{source_labels[name]}: searching...")
+
+        def render_source(result):
+            name, value = result["source"], result["value"]
+            with panels[name].container():
+                st.markdown(f"**{source_labels[name]}** · {result['elapsed']:.2f} s")
+                if result["status"] != "ok":
+                    st.warning(f"Unavailable: {result['error']}")
+                elif not value:
+                    st.caption("No results.")
+                elif name == "textbook":
+                    for pos, topic, ocr_match, text_match in value[:5]:
+                        where = " + ".join(w for w, hit in (("text", text_match), ("diagram", ocr_match)) if hit)
+                        st.write(f"• {topic} (Page {pos + 1}) — {where}")
+                elif name == "wikipedia":
+                    st.write(f"[{value['title']}]({value['url']}): {value['summary']}")
+                    if value.get("options"):
+                        st.caption("Did you mean: " + ", ".join(value["options"][:3]) + "?")
+                else:
+                    for rec in value:
+                        st.write(f"• [{rec['title']}]({rec['url']})")
+
+        fan_out(unified_sources, on_result=render_source)
+    st.divider()
+
     st.subheader("📚 Quick Wikipedia Summary")
     user_input = st.text_input("Search for any topic (e.g., DNA, MITOSIS, CRISPR):")
     
     if user_input:
         with st.spinner(f"Searching for '{user_input}'..."):
             try:
-                search_results = wikipedia.search(user_input, results=5)
-                if not search_results:
+                # One API call for title + intro + URL, served from the TTL cache when possible
+                article = wiki_client.summary(user_input)
+                if not article:
                     st.error("❌ No results found on Wikipedia.")
+                elif article["disambiguation"]:
+                    options = article.get("options") or []
+                    if options:
+                        st.warning(f"Too many matches for '{article['title']}'. Did you mean: {', '.join(options[:3])}?")
+                    else:
+                        st.warning(f"Too many matches for '{article['title']}'. Try a more specific term.")
                 else:
-                    target_title = search_results[0]
-                    page = wikipedia.page(target_title, auto_suggest=False)
-                    summary = wikipedia.summary(target_title, sentences=4, auto_suggest=False)
+                    summary = article["summary"]
                     
                     # --- NEW RESEARCH CARD UI ---
                     st.markdown(f"""
                         <div style="background-color: #f0f2f6; padding: 20px; border-radius: 10px; border-left: 5px solid #1e468a;">
-                            <h3 style="margin-top: 0;">📚 Research Snapshot: {page.title}</h3>
+                            <h3 style="margin-top: 0;">📚 Research Snapshot: {article["title"]}</h3>
                             <p style="font-size: 1.1rem; line-height: 1.6;">{summary}</p>
                         </div>
                     """, unsafe_allow_html=True)
@@ -634,13 +827,11 @@ with tabs[5]:
 
                     col1, col2 = st.columns(2)
                     with col1:
-                        st.link_button("📖 Read Full Article", page.url, use_container_width=True)
+                        st.link_button("📖 Read Full Article", article["url"], use_container_width=True)
                     with col2:
                         google_url = f"https://www.google.com/search?q={user_input.replace(' ', '+')}+biology+research+gate"
                         st.link_button("🔬 Search ResearchGate", google_url, use_container_width=True)
                         
-            except wikipedia.exceptions.DisambiguationError as e:
-                st.warning(f"Too many matches. Did you mean: {', '.join(e.options[:3])}?")
             except Exception as e:
                 st.error("Could not fetch detailed summary. Try a more specific term.")
 
@@ -653,13 +844,14 @@ with tabs[5]:
         if s_query:
             with st.spinner("Searching NCBI..."):
                 try:
-                    url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
-                    res = requests.get(url, params={"db": s_type, "term": s_query, "retmode": "json", "retmax": 5}).json()
-                    ids = res.get("esearchresult", {}).get("idlist", [])
-                    if ids:
+                    # esearch + one batched esummary, rate-limited and cached (see ncbi_client.py)
+                    records = ncbi_client.search(s_type, s_query, retmax=5)
+                    if records:
                         st.caption("🛡️ Verified Technical Records found:")
-                        for rid in ids:
-                            st.write(f"✅ **Record {rid}:** [View Official NCBI Data](https://www.ncbi.nlm.nih.gov/{s_type}/{rid})")
+                        for rec in records:
+                            st.write(f"✅ **{rec['title']}** — [View Official NCBI Data]({rec['url']})")
+                            if rec["detail"]:
+                                st.caption(f"{rec['id']} · {rec['detail']}")
                     else:
                         st.warning("No technical records found.")
                 except Exception as e:
@@ -670,38 +862,71 @@ with tabs[5]:
 # =========================
 # TAB 6: HINDI HELPER
 # =========================
+@st.cache_resource
+def load_translator():
+    # Shared segment cache: sentences already translated by anyone are never sent again
+    return TranslationService(target="hi")
+
+
+hindi = load_translator()
+
 with tabs[6]:
     st.header("🇮🇳 Hindi Helper")
     txt = st.text_area("Paste English text to translate to Hindi:")
     if st.button("Translate"):
         if txt.strip():
             try:
-                translated = GoogleTranslator(source="auto", target="hi").translate(txt)
+                translated = hindi.translate(txt)
                 st.info(translated)
             except Exception as e:
                 st.error("Translation Error.")
+
+    # Current Reader page in Hindi: pre-translated columns if present (see translation.py), else the cache
+    if not knowledge_df.empty and st.toggle("Show the current textbook page in Hindi", key="hindi_page"):
+        page = knowledge_df.iloc[st.session_state.page_index]
+        try:
+            for col in ("Topic", "Explanation"):
+                hindi_text = page.get(f"Hindi_{col}")
+                if not isinstance(hindi_text, str) or not hindi_text.strip():
+                    english = page.get(col)
+                    hindi_text = hindi.translate(english if isinstance(english, str) else "")
+                st.markdown(f"### {hindi_text}" if col == "Topic" else hindi_text)
+        except Exception as e:
+            st.error("Translation Error.")
 # ==========================================
 # TAB 7: SEQUENCE ANALYZER
 # ==========================================
+SUITE_PREVIEW_CHARS = 5000
+
+
+@st.cache_resource
+def load_restriction_scanner():
+    # Enzyme table parsed and compiled into one automaton once per process
+    return DigestScanner(load_enzymes())
+
+
 with tabs[7]:
     st.header("🧬 Advanced Molecular Suite")
     raw_seq = st.text_area("Paste DNA Sequence:", "ATGGCCATTGTAATGGGCCGCTGAAAGGGTACCCGATAG", key="dna_input_area").upper().strip()
     
     if raw_seq:
-        # ... (keep your length and GC calculation lines here) ...
-        seq_len = len(raw_seq)
-        gc_count = raw_seq.count('G') + raw_seq.count('C')
-        gc_content = (gc_count / seq_len) * 100 if seq_len > 0 else 0
+        # Encoded once into a NumPy array; counts, GC and MW come from one bincount
+        profile = SequenceProfile(raw_seq)
+        seq_len = profile.length
+        # One cleaned template, so digest and PCR coordinates refer to the same bases
+        template_seq = clean_dna(raw_seq)
+        template_codes = encode(template_seq)
+        gc_content = profile.gc_content
         
         # 1. Metrics and Chart (Indented inside the IF)
         col1, col2, col3 = st.columns(3)
         col1.metric("Length", f"{seq_len} bp")
         col2.metric("GC Content", f"{gc_content:.1f}%")
-        mw = (raw_seq.count('A')*313.2) + (raw_seq.count('T')*304.2) + (raw_seq.count('C')*289.2) + (raw_seq.count('G')*329.2)
+        mw = profile.molecular_weight
         col3.metric("Mol. Weight", f"{mw:,.1f} Da")
         df = pd.DataFrame({
                 'Nucleotide': ['A', 'T', 'G', 'C'],
-                'Count': [raw_seq.count('A'), raw_seq.count('T'), raw_seq.count('G'), raw_seq.count('C')]
+                'Count': [profile.counts[b] for b in 'ATGC']
             })
             
         fig = px.bar(df, x='Nucleotide', y='Count', color='Nucleotide',
@@ -713,22 +938,142 @@ with tabs[7]:
         c1, c2 = st.columns(2)
         with c1:
                with st.expander("🔗 Complementary Strand", expanded=True):
-                    pairs = {"A": "T", "T": "A", "G": "C", "C": "G"}
-                    comp = "".join([pairs.get(b, "N") for b in raw_seq])
-                    st.code(f"3'- {comp} -5'")
+                    comp = profile.complement()
+                    st.code(f"3'- {comp[:SUITE_PREVIEW_CHARS]}{' ...' if len(comp) > SUITE_PREVIEW_CHARS else ''} -5'")
 
 
         
         with c2:
             with st.expander("🧪 Protein Translation", expanded=True):
-                # FULL CODON MAP
-                codon_map = {'ATA':'I', 'ATC':'I', 'ATT':'I', 'ATG':'M', 'ACA':'T', 'ACC':'T', 'ACG':'T', 'ACT':'T', 'AAC':'N', 'AAT':'N', 'AAA':'K', 'AAG':'K', 'AGC':'S', 'AGT':'S', 'AGA':'R', 'AGG':'R', 'CTA':'L', 'CTC':'L', 'CTG':'L', 'CTT':'L', 'CCA':'P', 'CCC':'P', 'CCG':'P', 'CCT':'P', 'CAC':'H', 'CAT':'H', 'CAA':'Q', 'CAG':'Q', 'CGA':'R', 'CGC':'R', 'CGG':'R', 'CGT':'R', 'GTA':'V', 'GTC':'V', 'GTG':'V', 'GTT':'V', 'GCA':'A', 'GCC':'A', 'GCG':'A', 'GCT':'A', 'GAC':'D', 'GAT':'D', 'GAA':'E', 'GAG':'E', 'GGA':'G', 'GGC':'G', 'GGG':'G', 'GGT':'G', 'TCA':'S', 'TCC':'S', 'TCG':'S', 'TCT':'S', 'TTC':'F', 'TTT':'F', 'TTA':'L', 'TTG':'L', 'TAC':'Y', 'TAT':'Y', 'TAA':'_', 'TAG':'_', 'TGC':'C', 'TGT':'C', 'TGA':'_', 'TGG':'W'}
-                protein = ""
-                for i in range(0, len(raw_seq)-2, 3):
-                    codon = raw_seq[i:i+3]
-                    protein += codon_map.get(codon, '?')
+                # Vectorized lookup into the 64-entry codon table (see seq_core)
+                protein = profile.translate()
                 # THIS LINE BELOW puts it INSIDE the box
-                st.write(f"**Protein:** `{protein}`")
+                st.write(f"**Protein:** `{protein[:SUITE_PREVIEW_CHARS]}{' ...' if len(protein) > SUITE_PREVIEW_CHARS else ''}`")
+
+        # Six-frame translation and ORF scan (single codon-index track per strand)
+        with st.expander("🧭 Six-Frame Translation & ORF Finder"):
+            o1, o2 = st.columns(2)
+            min_orf_aa = o1.number_input("Minimum ORF length (aa)", min_value=1, value=30, step=10, key="orf_min_aa")
+            partial_orfs = o2.toggle("Include ORFs open at the sequence end", value=False, key="orf_partial")
+            frames = profile.six_frames()
+            st.dataframe(pd.DataFrame({
+                "Frame": list(frames),
+                "Translation": [aa[:SUITE_PREVIEW_CHARS] for aa in frames.values()],
+            }), hide_index=True, use_container_width=True)
+            orfs = profile.orfs(min_aa=int(min_orf_aa), include_partial=partial_orfs)
+            if orfs:
+                st.caption(f"{len(orfs):,} ORF(s) found, longest first. Coordinates are 1-based on the given strand.")
+                st.dataframe(pd.DataFrame(orfs), hide_index=True, use_container_width=True)
+            else:
+                st.info("No ORFs of this length found in any frame.")
+
+        # Windowed composition from prefix sums; long traces are decimated before plotting
+        with st.expander("📈 Sliding-Window GC / Skew Profile"):
+            w1, w2, w3 = st.columns(3)
+            default_window = int(min(max(seq_len // 20, 10), 100_000))
+            window_size = w1.number_input("Window (bp)", min_value=2, value=default_window, step=10, key="gc_window")
+            window_step = w2.number_input("Step (bp)", min_value=1, value=max(1, default_window // 2), step=5, key="gc_step")
+            decimation = w3.selectbox("Downsampling", ["lttb", "minmax"], key="gc_decimation",
+                                      help="Applied automatically above a few thousand points")
+            windows = profile.windows(int(window_size), int(window_step))
+            if len(windows["position"]):
+                n_windows = len(windows["position"])
+                gc_fig = go.Figure()
+                for key, name in (("gc", "GC %"), ("gc_skew", "GC skew"), ("at_skew", "AT skew")):
+                    x, y = decimate(windows["position"], windows[key], MAX_PLOT_POINTS, method=decimation)
+                    gc_fig.add_trace(go.Scattergl(x=x, y=y, mode="lines", name=name, yaxis="y" if key == "gc" else "y2"))
+                gc_fig.update_layout(
+                    height=320, margin=dict(t=30, b=30),
+                    xaxis_title="Position (bp)",
+                    yaxis=dict(title="GC %"),
+                    yaxis2=dict(title="Skew", overlaying="y", side="right", range=[-1, 1]),
+                    legend=dict(orientation="h"),
+                )
+                st.plotly_chart(gc_fig, use_container_width=True)
+                if n_windows > MAX_PLOT_POINTS:
+                    st.caption(f"{n_windows:,} windows downsampled to {MAX_PLOT_POINTS:,} points per trace ({decimation}).")
+            else:
+                st.info("Sequence is shorter than the window.")
+
+        # Restriction digest: every enzyme's sites found in one automaton pass
+        with st.expander("✂️ Restriction Digest & Virtual Gel"):
+            digest_scanner = load_restriction_scanner()
+            enzyme_names = [e.name for e in digest_scanner.enzymes]
+            r1, r2 = st.columns([3, 1])
+            chosen = r1.multiselect("Enzymes", enzyme_names,
+                                    default=[n for n in ("EcoRI", "BamHI", "HindIII") if n in enzyme_names], key="digest_enzymes")
+            circular = r2.toggle("Circular template", value=False, key="digest_circular")
+            digest_seq = template_seq
+            if chosen and digest_seq:
+                per_enzyme, combined = digest(digest_seq, digest_scanner, names=chosen, circular=circular)
+                st.dataframe(pd.DataFrame([{
+                    "Enzyme": name,
+                    "Site": per_enzyme[name]["enzyme"].spec,
+                    "Cuts": len(per_enzyme[name]["cuts"]),
+                    "Cut positions": ", ".join(str(c) for c in per_enzyme[name]["cuts"][:50]),
+                } for name in chosen]), hide_index=True, use_container_width=True)
+                st.caption(f"{len(combined):,} fragment(s) from the {' + '.join(chosen)} digest (0-based top-strand cuts).")
+                st.dataframe(pd.DataFrame(combined, columns=["Start", "End", "Size (bp)"]).sort_values("Size (bp)", ascending=False),
+                             hide_index=True, use_container_width=True)
+
+                lanes = [("1 kb ladder", LADDER_1KB)] + [(name, [f[2] for f in per_enzyme[name]["fragments"]]) for name in chosen]
+                if len(chosen) > 1:
+                    lanes.append((" + ".join(chosen), [f[2] for f in combined]))
+                gel_fig = go.Figure()
+                for lane, (label, sizes) in enumerate(lanes):
+                    gel_fig.add_trace(go.Scatter(
+                        x=[lane] * len(sizes), y=gel_migration(sizes), mode="markers", name=label,
+                        marker=dict(symbol="line-ew", size=40, line=dict(width=4, color="#E0E0E0" if lane else "#7FDBFF")),
+                        text=[f"{s:,} bp" for s in sizes], hoverinfo="text+name", showlegend=False,
+                    ))
+                gel_fig.update_layout(
+                    height=420, margin=dict(t=30, b=30), plot_bgcolor="#111", paper_bgcolor="#111", font=dict(color="white"),
+                    xaxis=dict(tickvals=list(range(len(lanes))), ticktext=[l for l, _ in lanes], showgrid=False),
+                    yaxis=dict(range=[1.05, -0.05], showticklabels=False, showgrid=False),
+                )
+                st.plotly_chart(gel_fig, use_container_width=True)
+
+        # Primer analysis: nearest-neighbour Tm and structure scores, amplicons on the sequence above
+        with st.expander("🧷 Primer Analysis & In-silico PCR"):
+            p1, p2 = st.columns(2)
+            fwd_primer = p1.text_input("Forward primer (5'→3')", key="primer_fwd").upper().strip()
+            rev_primer = p2.text_input("Reverse primer (5'→3')", key="primer_rev").upper().strip()
+            p3, p4, p5 = st.columns(3)
+            primer_nm = p3.number_input("Primer (nM)", min_value=1.0, value=50.0, step=10.0, key="primer_nm")
+            na_mm = p4.number_input("Na⁺ (mM)", min_value=1.0, value=50.0, step=10.0, key="primer_na")
+            max_mm = p5.number_input("Max mismatches", min_value=0, max_value=5, value=0, key="primer_mm")
+            primer_list = [p for p in (fwd_primer, rev_primer) if clean_dna(p)]
+            if primer_list:
+                primer_tms = melting_temperatures(primer_list, primer_nm, na_mm)
+                st.dataframe(pd.DataFrame([{
+                    "Primer": p,
+                    "Length": len(clean_dna(p)),
+                    "GC %": round(gc_percent(p), 1),
+                    "Tm (°C)": round(float(tm), 1),
+                    "Hairpin ΔG": round(hairpin_dg(p), 2),
+                    "Self-dimer ΔG": round(self_dimer_dg(p), 2),
+                } for p, tm in zip(primer_list, primer_tms)]), hide_index=True, use_container_width=True)
+                st.caption("ΔG in kcal/mol at 37 °C for the most stable contiguous duplex; below about −6 is a likely problem.")
+            if len(primer_list) == 2:
+                st.write(f"**Cross-dimer ΔG:** {cross_dimer_dg(fwd_primer, rev_primer):.2f} kcal/mol")
+                amplicons = find_amplicons(template_codes, fwd_primer, rev_primer, max_mismatches=int(max_mm))
+                if amplicons:
+                    st.dataframe(pd.DataFrame(amplicons), hide_index=True, use_container_width=True)
+                else:
+                    st.info("No product from this pair on the sequence above.")
+            plate_file = st.file_uploader("Primer plate CSV (name, forward, reverse)", type=["csv"], key="primer_plate")
+            if plate_file is not None:
+                try:
+                    plate = read_plate(io.StringIO(plate_file.getvalue().decode("utf-8-sig")))
+                    plate_rows = screen_pairs(plate, template_codes, primer_nm, na_mm, int(max_mm))
+                except UnicodeDecodeError:
+                    st.error("Could not read plate: the CSV is not UTF-8 text.")
+                    plate_rows = []
+                except ValueError as e:
+                    st.error(f"Could not screen plate: {e}")
+                    plate_rows = []
+                if plate_rows:
+                    st.dataframe(pd.DataFrame(plate_rows), hide_index=True, use_container_width=True)
 
         # 3. Insight (Indented inside the IF so it doesn't show in other tabs)
         if gc_content > 60:
@@ -737,6 +1082,21 @@ with tabs[7]:
             st.info("ℹ️ Low GC Content: AT-rich region.")
         else:
             st.success("✅ Balanced GC Content: Normal distribution.")
+    # Batch mode: the same metrics for every record of a multi-FASTA (see seq_batch.py for the CLI)
+    with st.expander("📦 Batch Analysis (multi-FASTA)"):
+        batch_file = st.file_uploader("Multi-FASTA / FASTQ (plain or gzipped)", type=["fa", "fasta", "fna", "fq", "fastq", "gz", "txt"], key="batch_upload")
+        if batch_file is not None:
+            try:
+                batch_df = batch_metrics(batch_file.file_id, batch_file.getvalue())
+            except ValueError as e:
+                st.error(f"Could not parse file: {e}")
+                batch_df = None
+            if batch_df is not None and len(batch_df):
+                st.dataframe(batch_df, hide_index=True, use_container_width=True)
+                st.download_button("📥 Download Metrics CSV", data=batch_df.to_csv(index=False), file_name="sequence_metrics.csv", mime="text/csv", key="batch_download")
+                if st.checkbox("Include mRNA / protein sequences", key="batch_with_seqs"):
+                    st.download_button("📥 Download CSV with Sequences", data=batch_sequences_csv(batch_file.file_id, batch_file.getvalue()),
+                                       file_name="sequence_metrics_full.csv", mime="text/csv", key="batch_download_full")
 # Insert this at the top of your Tab 8 code
 st.markdown("""
 <style>
@@ -767,6 +1127,26 @@ st.markdown("""
 # ==========================================
 # TAB 8: 🔬 BIO-NEXUS STRUCTURE ENGINE
 # ==========================================
+@st.cache_resource
+def load_structure_store():
+    return StructureStore()
+
+
+structure_store = load_structure_store()
+
+
+@st.cache_data
+def structure_properties(pdb_id):
+    # Memoized per PDB ID: repeated clicks and reruns reuse the result
+    return protein_properties(list(structure_store.load(pdb_id).protein_sequences().values()))
+
+
+@st.cache_data
+def structure_pockets(pdb_id):
+    # Ligand contacts, or a grid cavity scan for apo entries (see pockets.py)
+    return find_pockets(structure_store.load(pdb_id).atoms)
+
+
 with tabs[8]:
     try:
         from stmol import showmol
@@ -805,8 +1185,11 @@ with tabs[8]:
         """, unsafe_allow_html=True)
 
         # 2. RENDER ENGINE (With Mechanobiology Logic)
-        def render_advanced_protein(pdb_id, style_type, color_type, remove_water=False, show_surface=False, spin=True, dark_mode=True, force_mode=False):
-            view = py3Dmol.view(query=f'pdb:{pdb_id}')
+        def render_advanced_protein(structure, style_type, color_type, remove_water=False, show_surface=False, spin=True, dark_mode=True, force_mode=False, chains=None, site_residues=None):
+            # Water / chain selection and level of detail are applied server-side; only the reduced model is sent
+            model, model_fmt, n_atoms, detail = structure.model_text(remove_water=remove_water, chains=chains)
+            view = py3Dmol.view()
+            view.addModel(model, model_fmt)
             bg_color = '#0e1117' if dark_mode else 'white'
             view.setBackgroundColor(bg_color)
             
@@ -820,13 +1203,22 @@ with tabs[8]:
                 'thickness': 0.4
             }})
             
-            if remove_water:
-                view.removeSelection({'resn': 'HOH'})
+            if site_residues:
+                # Reduced models keep one trace atom per residue, so mark those with spheres
+                site_style = {'sphere': {'color': 'orange', 'scale': 0.6}} if n_atoms < len(structure.atoms) else {'stick': {'colorscheme': 'orangeCarbon', 'radius': 0.25}}
+                by_chain = {}
+                for chain, resseq, _ in site_residues:
+                    by_chain.setdefault(chain, []).append(resseq)
+                for chain, resi in by_chain.items():
+                    view.addStyle({'chain': chain, 'resi': resi}, site_style)
+
             if show_surface:
                 view.addSurface(py3Dmol.VDW, {'opacity': 0.3, 'colorscheme': final_color})
                 
             view.zoomTo()
             view.spin(spin)
+            if n_atoms < len(structure.atoms):
+                st.caption(f"Showing {n_atoms:,} of {len(structure.atoms):,} atoms ({detail}).")
             return showmol(view, height=600, width=800)
 
         # 3. HEADER & CONTROL PANEL
@@ -850,15 +1242,23 @@ with tabs[8]:
         # 4. MAIN INTERFACE LAYOUT
         col_main, col_side = st.columns([3, 1])
         
-        # DATABASE LOGIC (C. elegans focus for NCBS)
-        pdb_data = {
-            "1BNA": {"chains": "2", "res": "24", "type": "DNA B-Form", "helix": 0.0, "sheet": 0.0},
-            "1A8M": {"chains": "4", "res": "574", "type": "Hemoglobin", "helix": 0.72, "sheet": 0.12},
-            "1WBD": {"chains": "1", "res": "450", "type": "C. elegans Myosin", "helix": 0.65, "sheet": 0.15},
-            "2SPY": {"chains": "2", "res": "280", "type": "Spectrin (NCBS Model)", "helix": 0.88, "sheet": 0.05}
-        }
-
-        stats = pdb_data.get(target_pdb.upper(), {"chains": "1", "res": "Unknown", "type": "Protein", "helix": 0.5, "sheet": 0.2})
+        # Parsed once per process from the cached PDB/mmCIF file (see structure_store.py)
+        try:
+            structure = structure_store.load(target_pdb)
+        except (StructureNotFound, StructureFetchError) as e:
+            st.error(str(e))
+            structure = None
+
+        if structure is not None:
+            stats = {
+                "chains": str(len(structure.chains)),
+                "res": f"{structure.residue_count:,}",
+                "type": structure.title or "Protein",
+                "helix": structure.helix_fraction,
+                "sheet": structure.sheet_fraction,
+            }
+        else:
+            stats = {"chains": "-", "res": "Unknown", "type": "Protein", "helix": 0.0, "sheet": 0.0}
 
         with col_side:
             # NCBS Lab Special Feature
@@ -887,6 +1287,7 @@ with tabs[8]:
             st.divider()
             
             st.markdown("### Structure Analysis")
+            st.progress(stats['helix'], text=f"Alpha Helices: {int(stats['helix']*100)}%")
             st.progress(stats['sheet'], text=f"Beta Sheets: {int(stats['sheet']*100)}%")
             st.markdown("<br>", unsafe_allow_html=True) # Adds a small gap
             if target_pdb.upper() in ["1WBD", "2SPY"]:
@@ -898,13 +1299,30 @@ with tabs[8]:
         with col_main:
             if 'show_surf' not in st.session_state: 
                 st.session_state.show_surf = False
+            if 'show_site' not in st.session_state:
+                st.session_state.show_site = False
+
+            site = None
+            if structure is not None and (st.session_state.show_site or "HIGHLIGHT ACTIVE SITE" in chat_query):
+                found = structure_pockets(structure.pdb_id)
+                site = found["pockets"][0] if found["pockets"] else None
             
             # Call Render Function
-            render_advanced_protein(
-                target_pdb, style_choice, color_choice, 
-                remove_water=water_flag, show_surface=st.session_state.show_surf,
-                spin=spin_flag, dark_mode=dark_mode, force_mode=lab_mode
-            )
+            if structure is not None:
+                chain_choice = []
+                if len(structure.chains) > 1:
+                    chain_choice = st.multiselect("Chains", structure.chains, placeholder="All chains", key="nexus_chains")
+                render_advanced_protein(
+                    structure, style_choice, color_choice, 
+                    remove_water=water_flag, show_surface=st.session_state.show_surf,
+                    spin=spin_flag, dark_mode=dark_mode, force_mode=lab_mode, chains=chain_choice,
+                    site_residues=site["residues"] if site else None
+                )
+                if site:
+                    source = "bound ligand contacts" if found["method"] == "ligand" else "buried cavity scan"
+                    st.caption(f"🎯 {site['label']} ({source}): " + ", ".join(f"{n}{r}{c}" for c, r, n in site["residues"]))
+                elif st.session_state.show_site:
+                    st.caption("🎯 No ligand or buried pocket found in this entry.")
             
             st.write("### Quick Actions")
             b1, b2, b3 = st.columns(3)
@@ -914,15 +1332,26 @@ with tabs[8]:
                     st.rerun()
             with b2:
                 if st.button("🎯 Highlight Active Site", use_container_width=True, key="nexus_btn2"):
-                    st.toast("Scanning Binding Pockets...")
+                    st.session_state.show_site = not st.session_state.show_site
+                    st.rerun()
             with b3:
-                if st.button("🧪 Predict Properties", use_container_width=True, key="nexus_btn3"):
-                    st.info("Calculated MW: 64.5 kDa | pI: 6.8")
+                predict_clicked = st.button("🧪 Predict Properties", use_container_width=True, key="nexus_btn3")
+            if predict_clicked and structure is not None:
+                props = structure_properties(structure.pdb_id)
+                if props is None:
+                    st.info("No protein chains in this entry.")
+                else:
+                    st.info(f"Calculated MW: {props['molecular_weight'] / 1000:,.1f} kDa | pI: {props['isoelectric_point']:.2f}")
+                    p1, p2, p3 = st.columns(3)
+                    p1.metric("ε₂₈₀ (M⁻¹cm⁻¹)", f"{props['extinction_oxidized']:,}", help=f"{props['extinction_reduced']:,} with all Cys reduced")
+                    p2.metric("GRAVY", f"{props['gravy']:+.3f}")
+                    p3.metric("Residues", f"{props['residues']:,} in {props['chains']} chain(s)")
+                    comp = pd.DataFrame({"Residue": list(props["composition"]), "%": list(props["composition"].values())})
+                    st.plotly_chart(px.bar(comp, x="Residue", y="%", height=250), use_container_width=True)
 
             with st.expander("🧬 Sequence Map"):
-                sequences = {"1BNA": "CGCGAATTCGCG", "1A8M": "VLSPADKT...", "1WBD": "MGDSEMAVFG...", "2SPY": "MEEKKDE..."}
-                current_seq = sequences.get(target_pdb.upper(), "SEQUENCE DATA NOT IN CACHE")
-                st.code(current_seq, wrap_lines=True)
+                current_seq = "\n".join(f">{chain}\n{seq}" for chain, seq in structure.sequences().items()) if structure else ""
+                st.code(current_seq or "NO POLYMER CHAINS IN MODEL", wrap_lines=True)
 
     except Exception as e:
         # THE SAFETY NET: Show this if you make a code error
@@ -966,6 +1395,12 @@ with st.sidebar:
 # =========================
 # TAB 10: 🔬 NCBS RESEARCH 
 # =========================
+@st.cache_data(max_entries=8)
+def tiff_preview(path, mtime_ns, size):
+    # Keyed on the file's identity as well as its path, so a changed file is re-read
+    return image_preview(path)
+
+
 with tabs[9]:
     # --- INTERNAL FUNCTIONS (You can move these to the top of your file later) ---
     def calculate_fret_efficiency(distance_nm, r0_nm=5.4):
@@ -1054,30 +1489,70 @@ with tabs[9]:
     with analysis_tab3:
         st.write("**Image Processing Pipeline**")
         
-        # Simulated Image Processing Steps
-        tool_choice = st.selectbox("Select Tool", ["OpenCV (cv2)", "Scikit-Image (skimage)", "CellProfiler Logic"])
-        
-        if tool_choice == "OpenCV (cv2)":
-            st.info("Using **cv2.Canny()** for edge detection and **cv2.findContours()** to identify cell boundaries.")
-            st.button("Run Edge Detection")
-            
-        elif tool_choice == "Scikit-Image (skimage)":
-            st.info("Using **skimage.filters.otsu** for thresholding and **skimage.measure.regionprops** for geometry.")
-            st.button("Calculate Cell Area")
-            
-        elif tool_choice == "CellProfiler Logic":
-            st.info("Simulating a pipeline: [IdentifyPrimaryObjects] -> [MeasureObjectIntensity] -> [ExportToSpreadsheet]")
-            st.button("Run Pipeline")
+        # Memory-mapped, tiled analysis in a process pool (see image_pipeline.py)
+        tiff_file = st.file_uploader("TIFF stack", type=["tif", "tiff"], key="tiff_upload")
+        tiff_name = ""
+        if TIFF_DATA_DIR:
+            # Multi-GB stacks are read in place, but only from the configured data directory
+            tiff_name = st.text_input("…or a TIFF in the server data directory (multi-GB stacks)", key="tiff_path").strip()
+        tool_choice = st.selectbox("Select Tool", ["Scikit-Image (skimage)", "Edge Detection (Canny)", "CellProfiler Logic"])
 
-        # Progress Bar for "Analysis"
         if st.button("🚀 Analyze Raw TIFF"):
-            progress_bar = st.progress(0)
-            for i in range(101):
-                import time
-                time.sleep(0.01)
-                progress_bar.progress(i)
-            st.success("Analysis Complete!")
-            st.json({"Mean_Intensity": 142.5, "Cell_Count": 12, "Avg_Strain": "8.4 pN"})
+            tiff_path = None
+            if tiff_file is not None:
+                # Streamed to a content-addressed file so the workers can memory-map it
+                tiff_file.seek(0)
+                tiff_path, tiff_label = store_upload(tiff_file), tiff_file.name
+            elif tiff_name:
+                try:
+                    tiff_path, tiff_label = resolve_data_path(tiff_name), os.path.basename(tiff_name)
+                except ValueError as e:
+                    st.error(str(e))
+            else:
+                st.error("Upload a TIFF stack first.")
+            if tiff_path is not None:
+                progress_bar = st.progress(0.0, text="Opening stack…")
+
+                def report(stage, done, total):
+                    progress_bar.progress(done / total, text=f"{stage.title()} pass: {done:,}/{total:,} tiles")
+
+                try:
+                    st.session_state.tiff_result = (tiff_path, tiff_label, analyze_stack(tiff_path, on_progress=report))
+                    progress_bar.progress(1.0, text="Analysis complete")
+                except Exception as e:
+                    progress_bar.empty()
+                    st.error(f"Could not analyse {tiff_label}: {e}")
+
+        if "tiff_result" in st.session_state:
+            result_path, result_label, result = st.session_state.tiff_result
+            frames_df = pd.DataFrame(result["frames"])
+            objects_df = pd.DataFrame(result["objects"], columns=OBJECT_FIELDS)
+            n_frames, height, width = result["shape"]
+            st.caption(f"{result_label}: {n_frames:,} frame(s) of {width:,} × {height:,} px")
+            r1, r2 = st.columns(2)
+            r1.metric("Otsu Threshold", f"{result['threshold']:,.1f}")
+            r2.metric("Cell Count", f"{len(objects_df):,}")
+
+            stat = os.stat(result_path)
+            thumb = tiff_preview(result_path, stat.st_mtime_ns, stat.st_size).astype(np.float32)
+            if tool_choice == "Edge Detection (Canny)":
+                from skimage.feature import canny
+
+                lo, hi = float(thumb.min()), float(thumb.max())
+                st.image(canny((thumb - lo) / (hi - lo) if hi > lo else thumb, sigma=CANNY_SIGMA).astype(np.uint8) * 255,
+                         caption="Canny edges (frame 0 preview)", use_container_width=True)
+                st.line_chart(frames_df.set_index("frame")["edge_pct"], height=150)
+            elif tool_choice == "Scikit-Image (skimage)":
+                st.image((thumb > result["threshold"]).astype(np.uint8) * 255,
+                         caption="Otsu foreground (frame 0 preview)", use_container_width=True)
+                if len(objects_df):
+                    st.plotly_chart(px.histogram(objects_df, x="area", nbins=50, height=250,
+                                                 labels={"area": "Cell area (px)"}), use_container_width=True)
+            else:
+                st.info("[IdentifyPrimaryObjects] → [MeasureObjectIntensity] → [ExportToSpreadsheet]")
+                st.dataframe(frames_df, use_container_width=True, hide_index=True)
+                st.download_button("⬇️ Objects CSV", objects_df.to_csv(index=False).encode("utf-8"),
+                                   file_name="tiff_objects.csv", mime="text/csv")
 
 
     # Bottom Pitch
@@ -1111,4 +1586,12 @@ with st.sidebar:
     
     st.caption("© 2026 Bio-Verify | Developed for Genomic Research")
 
+# =========================
+# BACKGROUND WARM-UP
+# =========================
+# Everything above has been sent to the browser; start loading the OCR model
+# and indexing any new diagrams now so they are ready by the time someone searches.
+ocr.warm()
+start_ocr_backfill()
+
 
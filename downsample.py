@@ -0,0 +1,60 @@
+import numpy as np
+
+# =========================
+# PLOT DOWNSAMPLING
+# =========================
+# Plotly draws every point it is given, and figures with millions of points
+# freeze the browser. Long traces are reduced server-side to a few thousand
+# points that keep the visual shape of the series.
+
+MAX_PLOT_POINTS = 3000
+
+
+def _bucket_edges(n, buckets):
+    # Edges over the interior points 1..n-2; first and last points are always kept
+    return np.linspace(1, n - 1, buckets + 1).astype(np.int64)
+
+
+def lttb(x, y, threshold=MAX_PLOT_POINTS):
+    """Largest-Triangle-Three-Buckets: indices of ``threshold`` representative points."""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    edges = _bucket_edges(n, threshold - 2)
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start = end
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        # Pick the point forming the largest triangle with the last kept point
+        # and the average of the next bucket
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+def minmax(y, max_points=MAX_PLOT_POINTS):
+    """Min/max decimation: the lowest and highest point of each bucket, in order."""
+    n = len(y)
+    if max_points >= n or max_points < 4:
+        return np.arange(n)
+    y = np.asarray(y, dtype=float)
+    buckets = (max_points - 2) // 2
+    edges = _bucket_edges(n, buckets)
+    starts = edges[:-1]
+    lo = np.array([s + np.argmin(y[s:e]) for s, e in zip(starts, edges[1:])])
+    hi = np.array([s + np.argmax(y[s:e]) for s, e in zip(starts, edges[1:])])
+    return np.unique(np.concatenate(([0], lo, hi, [n - 1])))
+
+
+def decimate(x, y, max_points=MAX_PLOT_POINTS, method="lttb"):
+    """Return (x, y) reduced to at most ``max_points`` points."""
+    idx = lttb(x, y, max_points) if method == "lttb" else minmax(y, max_points)
+    return np.asarray(x)[idx], np.asarray(y)[idx]
@@ -0,0 +1,274 @@
+import argparse
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+
+from search_index import normalize
+
+# =========================
+# PERSISTENT TTL + LRU CACHE
+# =========================
+# Remote lookups (Wikipedia, NCBI) are keyed by their normalized query and kept
+# in a small JSON-backed LRU. Entries are "fresh" for ``ttl`` seconds and may be
+# served "stale" for up to ``max_stale`` seconds more while a background
+# refresh runs, so a rerun never waits on the network for a query seen before.
+
+DEFAULT_TTL = 24 * 3600
+DEFAULT_MAX_STALE = 7 * 24 * 3600
+# "Nothing found" answers expire quickly (new articles, transient upstream gaps)
+DEFAULT_NEGATIVE_TTL = 15 * 60
+
+
+def normalize_query(query):
+    """Cache key for a free-text query: case-folded, accent-stripped, single-spaced."""
+    return " ".join(normalize(query).split())
+
+
+class TTLCache:
+    """Thread-safe LRU of JSON-serializable values with a time-to-live, saved to disk."""
+
+    def __init__(self, path=None, ttl=DEFAULT_TTL, max_stale=DEFAULT_MAX_STALE, max_entries=500):
+        self.path = path
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict(self._read())
+
+    def _read(self):
+        if not self.path:
+            return []
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return []
+        if not isinstance(data, dict):
+            return []
+        # Stored oldest-first, so the LRU order survives a restart
+        return [(k, v) for k, v in data.items() if isinstance(v, dict) and "stored" in v]
+
+    def get(self, key, now=None):
+        """Return (value, fresh) or None if missing or too old to serve."""
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            age = now - entry["stored"]
+            ttl = entry.get("ttl", self.ttl)
+            if age > ttl + entry.get("max_stale", self.max_stale):
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry["value"], age <= ttl
+
+    def put(self, key, value, now=None, ttl=None, max_stale=None):
+        """Store ``value``; ``ttl`` / ``max_stale`` override the cache defaults for this entry."""
+        with self._lock:
+            entry = {"stored": time.time() if now is None else now, "value": value}
+            if ttl is not None:
+                entry["ttl"] = ttl
+            if max_stale is not None:
+                entry["max_stale"] = max_stale
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._save()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _save(self):
+        if not self.path:
+            return
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+
+class CachedFetcher:
+    """Stale-while-revalidate wrapper around a ``fetch(query)`` function.
+
+    An empty result (None or [], i.e. "nothing found") is kept for
+    ``negative_ttl`` seconds only and never served stale.
+    """
+
+    def __init__(self, fetch, cache, negative_ttl=DEFAULT_NEGATIVE_TTL):
+        self._fetch = fetch
+        self.cache = cache
+        self.negative_ttl = negative_ttl
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def get(self, query, key=None):
+        """Cached ``fetch(query)``; ``key`` defaults to the normalized query string."""
+        key = normalize_query(query) if key is None else key
+        hit = self.cache.get(key)
+        if hit is not None:
+            value, fresh = hit
+            if not fresh:
+                self._revalidate(key, query)
+            return value
+        value = self._fetch(query)
+        self._store(key, value)
+        return value
+
+    def _store(self, key, value):
+        if not value:
+            self.cache.put(key, value, ttl=self.negative_ttl, max_stale=0)
+        else:
+            self.cache.put(key, value)
+
+    def _revalidate(self, key, query):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                self._store(key, self._fetch(query))
+            except Exception:
+                # Keep serving the stale copy; the next read retries
+                pass
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=run, daemon=True).start()
+
+
+# =========================
+# WIKIPEDIA SUMMARY CLIENT
+# =========================
+# One MediaWiki API call replaces the old search -> page -> summary round
+# trips: a search generator limited to the top hit, with its intro extract,
+# canonical URL and disambiguation flag in the same response (a disambiguation
+# page costs one more call, for its link list). The endpoint is
+# configurable (WIKIPEDIA_API_URL) so a local stub can stand in for Wikipedia.
+
+WIKIPEDIA_API_URL = os.environ.get("WIKIPEDIA_API_URL", "https://en.wikipedia.org/w/api.php")
+DEFAULT_WIKI_CACHE_PATH = "cache/wikipedia_cache.json"
+USER_AGENT = "bio-concepts-simplified/1.0 (educational Streamlit app)"
+
+# (connect, read) seconds: a slow upstream fails fast instead of hanging the tab
+DEFAULT_TIMEOUT = (3.05, 6.0)
+
+
+class WikipediaClient:
+    def __init__(self, api_url=WIKIPEDIA_API_URL, cache_path=DEFAULT_WIKI_CACHE_PATH,
+                 timeout=DEFAULT_TIMEOUT, sentences=4, ttl=DEFAULT_TTL, max_options=5):
+        self.api_url = api_url
+        self.timeout = timeout
+        self.sentences = sentences
+        self.max_options = max_options
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+        self.fetcher = CachedFetcher(self.fetch_uncached, TTLCache(cache_path, ttl=ttl))
+
+    def _get(self, params):
+        resp = self.session.get(self.api_url, params={"action": "query", "format": "json", "formatversion": 2, **params},
+                                timeout=self.timeout)
+        resp.raise_for_status()
+        return resp.json().get("query", {})
+
+    def disambiguation_options(self, title):
+        """Article titles linked from a disambiguation page."""
+        pages = self._get({"titles": title, "prop": "links", "plnamespace": 0, "pllimit": self.max_options}).get("pages", [])
+        return [link["title"] for page in pages for link in page.get("links", [])][:self.max_options]
+
+    def fetch_uncached(self, query):
+        """Top search hit as {"title", "summary", "url", "disambiguation", "options"}, or None."""
+        params = {
+            "redirects": 1, "generator": "search", "gsrsearch": query, "gsrlimit": 1,
+            "prop": "extracts|info|pageprops", "exintro": 1, "explaintext": 1,
+            "exsentences": self.sentences, "inprop": "url", "ppprop": "disambiguation",
+        }
+        pages = self._get(params).get("pages", [])
+        if not pages:
+            return None
+        page = pages[0]
+        title = page.get("title", query)
+        disambiguation = "disambiguation" in page.get("pageprops", {})
+        return {
+            "title": title,
+            "summary": page.get("extract", ""),
+            "url": page.get("fullurl") or page.get("canonicalurl", ""),
+            "disambiguation": disambiguation,
+            "options": self.disambiguation_options(title) if disambiguation else [],
+        }
+
+    def summary(self, query):
+        return self.fetcher.get(query)
+
+
+# =========================
+# LOCAL STUB + LATENCY BENCHMARK
+# =========================
+#   python fetch_cache.py --delay 0.3 --requests 500
+
+def serve_stub(delay=0.3, port=0):
+    """Start a fake MediaWiki API on localhost (answers after ``delay`` seconds)."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import parse_qs, urlparse
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            query = parse_qs(urlparse(self.path).query).get("gsrsearch", [""])[0]
+            time.sleep(delay)
+            body = json.dumps({"query": {"pages": [{
+                "title": query.title(), "extract": f"{query} is a stub summary.",
+                "fullurl": f"https://en.wikipedia.org/wiki/{query.replace(' ', '_')}",
+            }]}}).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _p95(samples):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+
+if __name__ == "__main__":
+    import random
+
+    parser = argparse.ArgumentParser(description="p95 latency of Wikipedia lookups against a local stub.")
+    parser.add_argument("--delay", type=float, default=0.3, help="stub response delay (s)")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--topics", type=int, default=20, help="distinct queries in the workload")
+    args = parser.parse_args()
+
+    server = serve_stub(args.delay)
+    api_url = f"http://127.0.0.1:{server.server_address[1]}/w/api.php"
+    rng = random.Random(0)
+    workload = [f"topic {rng.randrange(args.topics)}" for _ in range(args.requests)]
+
+    client = WikipediaClient(api_url, cache_path=None, timeout=(1, 5))
+    for label, lookup in (("uncached", client.fetch_uncached), ("cached", client.summary)):
+        timings = []
+        for q in workload:
+            t0 = time.perf_counter()
+            lookup(q)
+            timings.append(time.perf_counter() - t0)
+        print(f"{label:>9}: p50 {sorted(timings)[len(timings) // 2] * 1000:8.1f} ms   p95 {_p95(timings) * 1000:8.1f} ms")
+    server.shutdown()
@@ -0,0 +1,312 @@
+import argparse
+import hashlib
+import multiprocessing
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+
+import numpy as np
+
+# =========================
+# TILED TIFF ANALYSIS
+# =========================
+# Multi-page TIFF stacks are opened as a memory map (or page by page when the
+# file is compressed), so only the tiles being worked on are ever in RAM.
+# Every frame is cut into tiles that the process pool handles independently:
+#
+#   1. histogram pass - tile histograms are summed into one stack histogram
+#      and a single global Otsu threshold is taken from it;
+#   2. segment pass   - each tile (plus a halo of neighbouring pixels) is
+#      thresholded, labelled and measured with regionprops, and Canny edges
+#      are counted. An object belongs to the tile whose core holds its
+#      centroid, so objects on tile borders are counted exactly once.
+#
+# Workers open the file themselves; tasks are just (frame, tile bounds).
+
+# Server-side stacks may only be read from under this directory
+TIFF_DATA_DIR = os.environ.get("TIFF_DATA_DIR")
+DEFAULT_UPLOAD_DIR = os.path.join("cache", "uploads")
+
+TILE = 1024
+# Wider than Canny's smoothing footprint and typical cell diameters
+HALO = 48
+HIST_BINS = 4096
+MIN_OBJECT_AREA = 20
+CANNY_SIGMA = 2.0
+
+OBJECT_FIELDS = ["frame", "area", "mean_intensity", "centroid_y", "centroid_x"]
+
+# Per-worker handles; pools live for one analyze_stack call, so these never go stale
+_WORKER_STACKS = {}
+
+
+def store_upload(fileobj, upload_dir=DEFAULT_UPLOAD_DIR):
+    """Copy an uploaded file to ``<sha256>.tif`` (temp name, then rename); returns the path.
+
+    Content-addressed names mean sessions never overwrite each other and a
+    file that may still be mapped is never rewritten.
+    """
+    os.makedirs(upload_dir, exist_ok=True)
+    digest = hashlib.sha256()
+    tmp = os.path.join(upload_dir, f".{uuid.uuid4().hex}.tmp")
+    try:
+        with open(tmp, "wb") as out:
+            for chunk in iter(lambda: fileobj.read(1 << 20), b""):
+                digest.update(chunk)
+                out.write(chunk)
+        path = os.path.join(upload_dir, f"{digest.hexdigest()}.tif")
+        if os.path.exists(path):
+            os.remove(tmp)
+        else:
+            os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return path
+
+
+def resolve_data_path(name, data_dir=TIFF_DATA_DIR):
+    """Absolute path of ``name`` inside ``data_dir``; ValueError for anything outside it."""
+    if not data_dir:
+        raise ValueError("Server-side stacks are disabled (set TIFF_DATA_DIR).")
+    root = os.path.realpath(data_dir)
+    path = os.path.realpath(os.path.join(root, name))
+    if os.path.commonpath([root, path]) != root:
+        raise ValueError(f"{name} is outside the data directory.")
+    if not os.path.isfile(path):
+        raise ValueError(f"{name} not found in the data directory.")
+    return path
+
+
+def open_stack(path):
+    """(frames, Y, X) view of a TIFF: a memory map when possible, else a lazy page reader."""
+    import tifffile
+
+    try:
+        data = tifffile.memmap(path, mode="r")
+    except ValueError:
+        # Compressed or non-contiguous files cannot be mapped; decode one page at a time
+        return _PageStack(path)
+    if data.ndim == 2:
+        data = data[None]
+    elif data.shape[-1] in (3, 4) and data.ndim >= 3 and data.shape[-2] > 4:
+        data = data[..., 0]  # RGB(A) samples: analyse the first channel
+    return data.reshape(-1, *data.shape[-2:])
+
+
+class _PageStack:
+    """Indexable like a (frames, Y, X) array, decoding a single page on access."""
+
+    def __init__(self, path):
+        import tifffile
+
+        self.path = path
+        self._tif = tifffile.TiffFile(path)
+        self._cache = (None, None)
+        page = self._tif.pages[0]
+        self.dtype = page.dtype
+        self.shape = (len(self._tif.pages), *page.shape[:2])
+        self.ndim = 3
+
+    def close(self):
+        self._tif.close()
+
+    def __getitem__(self, key):
+        frame, *rest = key if isinstance(key, tuple) else (key,)
+        if self._cache[0] != frame:
+            page = self._tif.pages[frame].asarray()
+            self._cache = (frame, page[..., 0] if page.ndim == 3 else page)
+        return self._cache[1][tuple(rest)]
+
+
+@contextmanager
+def stack_reader(path):
+    """``open_stack`` that closes its file on exit (memory maps unmap once unreferenced)."""
+    stack = open_stack(path)
+    try:
+        yield stack
+    finally:
+        if isinstance(stack, _PageStack):
+            stack.close()
+
+
+def _in_worker(func, path, *args):
+    # Pool entry point: one open handle per worker process, reused for every tile
+    if path not in _WORKER_STACKS:
+        _WORKER_STACKS[path] = open_stack(path)
+    return func(_WORKER_STACKS[path], *args)
+
+
+def tile_bounds(height, width, tile=TILE):
+    """(y0, y1, x0, x1) cores covering a frame."""
+    return [(y, min(y + tile, height), x, min(x + tile, width))
+            for y in range(0, height, tile) for x in range(0, width, tile)]
+
+
+def otsu_threshold(counts, centers):
+    """Otsu's threshold from a histogram: maximises between-class variance."""
+    counts = np.asarray(counts, dtype=np.float64)
+    w0 = np.cumsum(counts)
+    w1 = w0[-1] - w0
+    m0 = np.cumsum(counts * centers)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        between = w0 * w1 * (m0 / w0 - (m0[-1] - m0) / w1) ** 2
+    between = np.nan_to_num(between[:-1])
+    return float(centers[np.argmax(between)]) if len(between) else float(centers[0])
+
+
+def _range_tile(stack, frame, bounds):
+    y0, y1, x0, x1 = bounds
+    tile = stack[frame, y0:y1, x0:x1]
+    return float(tile.min()), float(tile.max())
+
+
+def _histogram_tile(stack, frame, bounds, lo, hi):
+    y0, y1, x0, x1 = bounds
+    tile = stack[frame, y0:y1, x0:x1]
+    if lo is None:
+        # 8/16-bit data: exact counts for every grey level
+        info = np.iinfo(tile.dtype)
+        return np.bincount((tile.astype(np.int32) - info.min).ravel(), minlength=int(info.max) - int(info.min) + 1)
+    counts, _ = np.histogram(tile, bins=HIST_BINS, range=(lo, hi))
+    return counts
+
+
+def _segment_tile(stack, frame, bounds, threshold, lo, hi):
+    from skimage import feature, measure
+
+    height, width = stack.shape[1:]
+    y0, y1, x0, x1 = bounds
+    hy0, hy1 = max(0, y0 - HALO), min(height, y1 + HALO)
+    hx0, hx1 = max(0, x0 - HALO), min(width, x1 + HALO)
+    tile = np.asarray(stack[frame, hy0:hy1, hx0:hx1], dtype=np.float32)
+    core = (slice(y0 - hy0, y1 - hy0), slice(x0 - hx0, x1 - hx0))
+
+    mask = tile > threshold
+    props = measure.regionprops_table(measure.label(mask), intensity_image=tile,
+                                      properties=("area", "intensity_mean", "centroid"))
+    cy = props["centroid-0"] + hy0
+    cx = props["centroid-1"] + hx0
+    keep = (props["area"] >= MIN_OBJECT_AREA) & (cy >= y0) & (cy < y1) & (cx >= x0) & (cx < x1)
+    objects = np.column_stack([np.full(keep.sum(), frame), props["area"][keep], props["intensity_mean"][keep],
+                               cy[keep], cx[keep]])
+
+    # Canny on the stack-normalised tile, so hysteresis thresholds mean the same in every tile
+    scaled = (tile - lo) / (hi - lo) if hi > lo else np.zeros_like(tile)
+    edges = feature.canny(scaled, sigma=CANNY_SIGMA)[core]
+    fg = mask[core]
+    return {
+        "frame": frame,
+        "objects": objects,
+        "pixels": fg.size,
+        "foreground": int(fg.sum()),
+        "foreground_sum": float(tile[core][fg].sum()),
+        "edges": int(edges.sum()),
+    }
+
+
+def _run(pool, stack, path, func, tasks, stage, on_progress):
+    """Run ``func(stack, *task)`` for every task, yielding results as they complete."""
+    if pool is None:
+        results = (func(stack, *t) for t in tasks)
+    else:
+        results = (f.result() for f in as_completed([pool.submit(_in_worker, func, path, *t) for t in tasks]))
+    for done, result in enumerate(results, 1):
+        if on_progress is not None:
+            on_progress(stage, done, len(tasks))
+        yield result
+
+
+def analyze_stack(path, workers=None, tile=TILE, on_progress=None):
+    """Otsu / label / regionprops / Canny over every frame of a TIFF stack.
+
+    ``on_progress(stage, done, total)`` is called after every tile. Returns
+    ``{"threshold", "frames": [per-frame summary], "objects": (n, 5) array}``
+    with object rows laid out as ``OBJECT_FIELDS``.
+    """
+    with stack_reader(path) as stack:
+        return _analyze(stack, path, workers, tile, on_progress)
+
+
+def _analyze(stack, path, workers, tile, on_progress):
+    n_frames, height, width = stack.shape
+    tiles = [(f, b) for f in range(n_frames) for b in tile_bounds(height, width, tile)]
+    workers = workers or os.cpu_count()
+    pool = None
+    if workers > 1 and len(tiles) > 1:
+        # Spawned workers are safe to start from a server thread (see ocr_engine)
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    try:
+        dtype = np.dtype(stack.dtype)
+        if dtype.kind in "ui" and dtype.itemsize <= 2:
+            info = np.iinfo(dtype)
+            lo = hi = None
+            edges = np.arange(int(info.min), int(info.max) + 2) - 0.5
+        else:
+            ranges = list(_run(pool, stack, path, _range_tile, [(f, b) for f, b in tiles], "range", on_progress))
+            lo, hi = min(r[0] for r in ranges), max(r[1] for r in ranges)
+            edges = np.linspace(lo, hi, HIST_BINS + 1)
+        counts = sum(_run(pool, stack, path, _histogram_tile, [(f, b, lo, hi) for f, b in tiles], "histogram", on_progress))
+        # Only the occupied part of the range matters for Otsu and the Canny scaling
+        used = np.flatnonzero(counts)
+        lo, hi = float(edges[used[0]]), float(edges[used[-1] + 1])
+        threshold = otsu_threshold(counts, (edges[:-1] + edges[1:]) / 2)
+
+        frames = {f: {"frame": f, "objects": 0, "pixels": 0, "foreground": 0, "foreground_sum": 0.0, "edges": 0}
+                  for f in range(n_frames)}
+        objects = []
+        for part in _run(pool, stack, path, _segment_tile, [(f, b, threshold, lo, hi) for f, b in tiles], "segment", on_progress):
+            row = frames[part["frame"]]
+            row["objects"] += len(part["objects"])
+            for key in ("pixels", "foreground", "foreground_sum", "edges"):
+                row[key] += part[key]
+            objects.append(part["objects"])
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    objects = np.concatenate(objects) if objects else np.empty((0, len(OBJECT_FIELDS)))
+    summary = []
+    for f in range(n_frames):
+        row = frames[f]
+        areas = objects[objects[:, 0] == f, 1]
+        summary.append({
+            "frame": f,
+            "cell_count": row["objects"],
+            "mean_area_px": float(areas.mean()) if len(areas) else 0.0,
+            "foreground_pct": row["foreground"] / row["pixels"] * 100 if row["pixels"] else 0.0,
+            "mean_intensity": row["foreground_sum"] / row["foreground"] if row["foreground"] else 0.0,
+            "edge_pct": row["edges"] / row["pixels"] * 100 if row["pixels"] else 0.0,
+        })
+    return {"threshold": threshold, "shape": (n_frames, height, width), "frames": summary, "objects": objects}
+
+
+def preview(path, frame=0, max_side=512):
+    """Strided thumbnail of one frame (reads only the sampled rows); a copy, safe after close."""
+    with stack_reader(path) as stack:
+        step = max(1, -(-max(stack.shape[1:]) // max_side))
+        return np.array(stack[frame, ::step, ::step])
+
+
+if __name__ == "__main__":
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="Segment and measure every frame of a (multi-page) TIFF stack.")
+    parser.add_argument("tiff")
+    parser.add_argument("-o", "--out", default=None, help="per-object CSV")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--tile", type=int, default=TILE)
+    args = parser.parse_args()
+
+    def report(stage, done, total):
+        print(f"\r{stage}: {done}/{total} tiles", end="", flush=True)
+
+    result = analyze_stack(args.tiff, workers=args.workers, tile=args.tile, on_progress=report)
+    print()
+    print(f"Otsu threshold: {result['threshold']:.2f}")
+    print(pd.DataFrame(result["frames"]).to_string(index=False))
+    if args.out:
+        pd.DataFrame(result["objects"], columns=OBJECT_FIELDS).to_csv(args.out, index=False)
+        print(f"Wrote {len(result['objects']):,} objects to {args.out}")
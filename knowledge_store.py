@@ -0,0 +1,175 @@
+import argparse
+import json
+import os
+import re
+
+import pandas as pd
+
+from ocr_engine import file_digest
+
+# =========================
+# COMPILED KNOWLEDGE BASE
+# =========================
+# The textbook CSV has long multi-line fields and parsing it dominates cold
+# starts. It is compiled once into a Parquet artifact with a fixed schema
+# (categorical Section, pre-split Ten_Points) that loads in a single columnar
+# read. The artifact records the fingerprint of the CSV it was built from and
+# is rebuilt whenever that CSV changes.
+
+SOURCE_FILES = ["knowledge_base.csv", "knowledge.csv"]
+DEFAULT_ARTIFACT_PATH = os.path.join("cache", "knowledge_base.parquet")
+SCHEMA_VERSION = 1
+_META_KEY = b"bio_knowledge_source"
+
+TEXT_COLUMNS = ["Topic", "Explanation", "Image", "Detailed_Explanation"]
+COLUMNS = ["Topic", "Section", "Explanation", "Image", "Ten_Points", "Detailed_Explanation"]
+
+# Older sheets call the key-points column "10_Points"
+_COLUMN_ALIASES = {"10_Points": "Ten_Points"}
+
+# Points are separated by blank lines in the sheet
+_POINT_SPLIT_RE = re.compile(r"\n\s*\n")
+
+
+def find_source(paths=SOURCE_FILES):
+    for path in paths:
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def empty_knowledge_base():
+    df = pd.DataFrame({c: pd.Series(dtype=object) for c in COLUMNS})
+    df["Section"] = df["Section"].astype("category")
+    return df
+
+
+def split_points(value):
+    if not isinstance(value, str) or not value.strip():
+        return []
+    return [p.strip() for p in _POINT_SPLIT_RE.split(value.strip()) if p.strip()]
+
+
+def parse_csv(csv_path):
+    """Parse the textbook CSV into the compiled schema."""
+    # Section stays a string: "4.1" and "4.10" are different chapters
+    df = pd.read_csv(csv_path, dtype=str, keep_default_na=False, na_values=[""], encoding="utf-8-sig")
+    df.columns = df.columns.str.strip()
+    df = df.rename(columns=_COLUMN_ALIASES).dropna(how="all").reset_index(drop=True)
+
+    for col in COLUMNS:
+        if col not in df.columns:
+            df[col] = None
+    extra = [c for c in df.columns if c not in COLUMNS]
+    df = df[COLUMNS + extra]
+
+    for col in TEXT_COLUMNS + extra:
+        df[col] = df[col].where(df[col].notna(), None)
+    df["Section"] = df["Section"].str.strip().astype("category")
+    df["Ten_Points"] = df["Ten_Points"].map(split_points)
+    return df
+
+
+def source_fingerprint(csv_path):
+    st = os.stat(csv_path)
+    return {"path": os.path.normpath(csv_path), "mtime": st.st_mtime, "size": st.st_size, "schema": SCHEMA_VERSION}
+
+
+def _read_fingerprint(artifact_path):
+    import pyarrow.parquet as pq
+
+    meta = pq.read_schema(artifact_path).metadata or {}
+    raw = meta.get(_META_KEY)
+    return json.loads(raw) if raw else None
+
+
+def _is_current(artifact_path, csv_path):
+    try:
+        stored = _read_fingerprint(artifact_path)
+    except Exception:
+        return False
+    if not stored:
+        return False
+    current = source_fingerprint(csv_path)
+    if stored.get("path") != current["path"] or stored.get("schema") != SCHEMA_VERSION:
+        return False
+    if stored.get("mtime") == current["mtime"] and stored.get("size") == current["size"]:
+        return True
+    # Touched but unchanged (e.g. fresh checkout): compare contents
+    return stored.get("sha1") == file_digest(csv_path)
+
+
+def compile_knowledge_base(csv_path, artifact_path=DEFAULT_ARTIFACT_PATH):
+    """Write the Parquet artifact for ``csv_path`` and return the parsed frame."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    df = parse_csv(csv_path)
+    fields = [
+        pa.field(col, pa.dictionary(pa.int32(), pa.string()) if col == "Section"
+                 else pa.list_(pa.string()) if col == "Ten_Points"
+                 else pa.string())
+        for col in df.columns
+    ]
+    fingerprint = dict(source_fingerprint(csv_path), sha1=file_digest(csv_path))
+    schema = pa.schema(fields, metadata={_META_KEY: json.dumps(fingerprint).encode()})
+    table = pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+
+    folder = os.path.dirname(artifact_path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    tmp = f"{artifact_path}.{os.getpid()}.tmp"
+    pq.write_table(table, tmp)
+    os.replace(tmp, artifact_path)
+    return df
+
+
+def read_artifact(artifact_path=DEFAULT_ARTIFACT_PATH):
+    import pyarrow.parquet as pq
+
+    df = pq.read_table(artifact_path).to_pandas()
+    # pyarrow hands list cells back as numpy arrays; the app works with plain lists
+    df["Ten_Points"] = df["Ten_Points"].map(lambda pts: list(pts) if pts is not None else [])
+    return df
+
+
+def load_source(csv_path, artifact_path=DEFAULT_ARTIFACT_PATH):
+    """Load one specific CSV (through its artifact); parse errors propagate.
+
+    Used for live reloads: a half-written file must raise so the caller keeps
+    its last good snapshot, and the artifact is only rewritten after a
+    successful parse.
+    """
+    try:
+        if _is_current(artifact_path, csv_path):
+            return read_artifact(artifact_path)
+        return compile_knowledge_base(csv_path, artifact_path)
+    except (ImportError, OSError):
+        # No pyarrow or no writable cache: parse directly (and raise if that fails too)
+        return parse_csv(csv_path)
+
+
+def load_knowledge_base(paths=SOURCE_FILES, artifact_path=DEFAULT_ARTIFACT_PATH):
+    """Cold-start load: the first source that parses, else an empty knowledge base.
+
+    Sources are tried in order, skipping ones that fail to parse. Without
+    pyarrow (or a writable cache) the CSV is parsed directly as before.
+    """
+    for csv_path in [p for p in paths if os.path.exists(p)]:
+        try:
+            return load_source(csv_path, artifact_path)
+        except Exception:
+            continue
+    return empty_knowledge_base()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile the knowledge base CSV into a Parquet artifact.")
+    parser.add_argument("csv", nargs="?", default=None)
+    parser.add_argument("--out", default=DEFAULT_ARTIFACT_PATH)
+    args = parser.parse_args()
+    source = args.csv or find_source()
+    if source is None:
+        raise SystemExit("No knowledge base CSV found.")
+    df = compile_knowledge_base(source, args.out)
+    print(f"Compiled {len(df)} topics from {source} -> {args.out}")
@@ -0,0 +1,209 @@
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from knowledge_store import DEFAULT_ARTIFACT_PATH, SOURCE_FILES, find_source, load_knowledge_base, load_source
+from search_index import OCR_FIELD, SearchIndex, as_text, normalize, row_fields, substring_matches
+
+# =========================
+# LIVE KNOWLEDGE BASE
+# =========================
+# Editors push CSV updates several times a day. Instead of flushing every cache,
+# a watcher notices the change, reloads the (compiled) table, diffs it against
+# the previous one by Topic/Section and recomputes derived data (tags, OCR
+# text, search index entries, search blobs) only for rows that were added or
+# edited.
+
+
+def row_keys(df):
+    """Stable identity per row: (Topic, Section, n) where n numbers duplicates."""
+    seen = {}
+    keys = []
+    topics = df["Topic"] if "Topic" in df.columns else pd.Series("", index=df.index)
+    sections = df["Section"] if "Section" in df.columns else pd.Series("", index=df.index)
+    for topic, section in zip(topics, sections):
+        base = (as_text(topic).strip(), as_text(section).strip())
+        n = seen.get(base, 0)
+        seen[base] = n + 1
+        keys.append(base + (n,))
+    return keys
+
+
+def row_signature(row):
+    return tuple(as_text(v) for v in row.tolist())
+
+
+class _RowState:
+    __slots__ = ("signature", "tags", "image", "ocr_text", "search_blob", "ocr_blob")
+
+
+class LiveKnowledgeBase:
+    """Knowledge base plus its derived search state, updated in place on file change.
+
+    ``ocr_lookup(img_path)`` returns stored diagram text, "" when there is no
+    usable image, or None when the diagram still has to be OCR'd. ``tagger``
+    (a text_match.KeywordTagger) fills the per-row "Tags" column.
+    """
+
+    def __init__(self, paths=SOURCE_FILES, artifact_path=DEFAULT_ARTIFACT_PATH, ocr_lookup=None, tagger=None):
+        self.paths = list(paths)
+        self.artifact_path = artifact_path
+        self.ocr_lookup = ocr_lookup or (lambda img_path: "")
+        self.tagger = tagger
+        self.version = 0
+        self.df = pd.DataFrame()
+        self.blobs = pd.DataFrame(columns=["search_blob", "ocr_blob"])
+        self.index = SearchIndex()
+        self._keys = []
+        self._rows = {}
+        self._positions = {}
+        self._fingerprint = None
+        self._lock = threading.RLock()
+        self._watcher = None
+        # Cold start may fall back to another source or an empty table; reloads may not
+        fingerprint = self._source_fingerprint()
+        df = load_knowledge_base(self.paths, self.artifact_path)
+        with self._lock:
+            self._fingerprint = fingerprint
+            self._apply(df)
+
+    # --- change detection ---
+    def _source_fingerprint(self):
+        fp = []
+        for path in self.paths:
+            try:
+                st = os.stat(path)
+                fp.append((path, st.st_mtime_ns, st.st_size))
+            except OSError:
+                fp.append((path, None, None))
+        return tuple(fp)
+
+    def refresh(self, force=False):
+        """Reload if the source changed; returns (added/changed, removed) row counts.
+
+        Only the watched file is parsed, and any failure raises: the current
+        rows (and the compiled artifact) stay as they are until a good save.
+        """
+        fingerprint = self._source_fingerprint()
+        if not force and fingerprint == self._fingerprint:
+            return 0, 0
+        source = find_source(self.paths)
+        if source is None:
+            raise FileNotFoundError("No knowledge base source to reload.")
+        df = load_source(source, self.artifact_path)
+        with self._lock:
+            self._fingerprint = fingerprint
+            return self._apply(df)
+
+    def watch(self, interval=2.0):
+        """Poll the source files from a daemon thread (idempotent)."""
+        if self._watcher is not None:
+            return
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.refresh()
+                except Exception:
+                    # Half-written CSV etc.: keep serving the old rows, retry next tick
+                    continue
+
+        self._watcher = threading.Thread(target=loop, name="kb-watcher", daemon=True)
+        self._watcher.start()
+
+    # --- incremental update ---
+    def _apply(self, df):
+        df = df.reset_index(drop=True)
+        keys = row_keys(df)
+        old_rows = self._rows
+        new_rows = {}
+        changed = 0
+
+        for key, (_, row) in zip(keys, df.iterrows()):
+            signature = row_signature(row)
+            state = old_rows.get(key)
+            if state is not None and state.signature == signature:
+                new_rows[key] = state
+                continue
+            new_rows[key] = self._derive(key, row, signature, state)
+            changed += 1
+
+        removed = [key for key in old_rows if key not in new_rows]
+        for key in removed:
+            self.index.remove(key)
+
+        df["Tags"] = [new_rows[k].tags for k in keys]
+        self.df = df
+        self._keys = keys
+        self._rows = new_rows
+        self._positions = {key: pos for pos, key in enumerate(keys)}
+        self.blobs = pd.DataFrame({
+            "search_blob": [new_rows[k].search_blob for k in keys],
+            "ocr_blob": [new_rows[k].ocr_blob for k in keys],
+        })
+        if changed or removed:
+            self.version += 1
+        return changed, len(removed)
+
+    def _derive(self, key, row, signature, previous=None):
+        state = _RowState()
+        state.signature = signature
+        tag_text = as_text(row.get("Explanation")) + "\n" + as_text(row.get("Detailed_Explanation"))
+        state.tags = self.tagger.tags(tag_text) if self.tagger is not None else []
+        state.image = as_text(row.get("Image")).strip()
+        if previous is not None and previous.image == state.image and previous.ocr_text is not None:
+            # Same diagram: reuse its OCR text rather than hitting the store again
+            state.ocr_text = previous.ocr_text
+        else:
+            state.ocr_text = self.ocr_lookup(state.image) if state.image else ""
+        fields = row_fields(row, state.ocr_text or "")
+        state.search_blob = normalize("\n".join(v for f, v in fields.items() if f != OCR_FIELD))
+        state.ocr_blob = normalize(state.ocr_text or "")
+        self.index.add(key, fields)
+        return state
+
+    # --- OCR backfill ---
+    def pending_ocr_images(self):
+        with self._lock:
+            return sorted({s.image for s in self._rows.values() if s.ocr_text is None})
+
+    def update_ocr(self, img_path, text):
+        """Attach freshly OCR'd text to every row that shows ``img_path``."""
+        with self._lock:
+            for pos, key in enumerate(self._keys):
+                state = self._rows[key]
+                if state.image != img_path:
+                    continue
+                state.ocr_text = text
+                state.ocr_blob = normalize(text)
+                self.index.add(key, row_fields(self.df.iloc[pos], text))
+                self.blobs.iat[pos, self.blobs.columns.get_loc("ocr_blob")] = state.ocr_blob
+
+    # --- queries ---
+    def search(self, query):
+        """Ranked whole-term hits, then substring-only hits: [(position, ocr_match, text_match)]."""
+        return self.search_rows(query)[1]
+
+    def search_rows(self, query):
+        """(df, hits) from one consistent snapshot: ``hits`` positions index into ``df``.
+
+        The whole query runs under the lock the reload holds while swapping the
+        frame, blobs and index, so a watcher reload cannot land in between.
+        """
+        with self._lock:
+            df = self.df
+            results = []
+            for key, _, fields in self.index.search(query):
+                pos = self._positions.get(key)
+                if pos is not None:
+                    results.append((pos, OCR_FIELD in fields, bool(fields - {OCR_FIELD})))
+            ranked = {pos for pos, _, _ in results}
+            mask, source = substring_matches(self.blobs, query)
+            for pos in np.flatnonzero(mask.to_numpy()):
+                if pos not in ranked:
+                    label = source.iat[pos]
+                    results.append((int(pos), label in ("ocr", "both"), label in ("text", "both")))
+        return df, results
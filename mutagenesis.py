@@ -0,0 +1,180 @@
+import numpy as np
+
+# =========================
+# MUTAGENESIS SIMULATOR
+# =========================
+# Builds a library of M mutant copies of a sequence in one vectorized pass:
+# the replicates are rows of a (M, L) uint8 matrix, mutation sites are drawn
+# for all rows at once from a seeded numpy Generator, and substitutions /
+# indels are applied with array indexing rather than per-base Python edits.
+# The library itself is M * L bytes, so that product is capped up front; site
+# sampling needs memory proportional to the number of mutations only.
+
+BASES = np.frombuffer(b"ACGT", dtype=np.uint8)
+_CODE = np.full(256, 255, dtype=np.uint8)
+_CODE[BASES] = np.arange(4, dtype=np.uint8)
+
+# In code space A=0, C=1, G=2, T=3: XOR 2 is the transition partner
+# (A<->G, C<->T); XOR 1 and XOR 3 are the two transversions.
+_TRANSITION_XOR = 2
+_TRANSVERSION_XOR = np.array([1, 3], dtype=np.uint8)
+
+# Largest library (replicates x sequence length, in bases) built in memory
+MAX_LIBRARY_BASES = 50_000_000
+
+SUBSTITUTION, INSERTION, DELETION = "substitution", "insertion", "deletion"
+
+
+class MutantLibrary:
+    """Mutant sequences plus a flat event table (one entry per mutation)."""
+
+    def __init__(self, sequences, events):
+        self.sequences = sequences
+        self.events = events
+
+    def __len__(self):
+        return len(self.sequences)
+
+    def event_rows(self):
+        """Events as a list of dicts (1-based positions on the original sequence)."""
+        ev = self.events
+        return [
+            {"Replicate": int(r) + 1, "Position": int(p) + 1, "Type": t, "Ref": ref, "Alt": alt, "Class": cls}
+            for r, p, t, ref, alt, cls in zip(ev["replicate"], ev["position"], ev["type"], ev["ref"], ev["alt"], ev["class"])
+        ]
+
+    def event_columns(self, limit=None):
+        """First ``limit`` events as display columns (arrays sliced before any conversion)."""
+        ev = {k: v[:limit] for k, v in self.events.items()}
+        return {
+            "Replicate": ev["replicate"] + 1, "Position": ev["position"] + 1, "Type": ev["type"],
+            "Ref": ev["ref"], "Alt": ev["alt"], "Class": ev["class"],
+        }
+
+    def summary(self):
+        cls = self.events["class"]
+        transitions = int(np.count_nonzero(cls == "transition"))
+        transversions = int(np.count_nonzero(cls == "transversion"))
+        types = self.events["type"]
+        return {
+            "replicates": len(self.sequences),
+            "mutations": int(len(cls)),
+            "substitutions": int(np.count_nonzero(types == SUBSTITUTION)),
+            "insertions": int(np.count_nonzero(types == INSERTION)),
+            "deletions": int(np.count_nonzero(types == DELETION)),
+            "transitions": transitions,
+            "transversions": transversions,
+            "ts_tv_ratio": transitions / transversions if transversions else float("nan"),
+        }
+
+    def to_fasta(self, prefix="mutant"):
+        return "".join(f">{prefix}_{i}\n{seq}\n" for i, seq in enumerate(self.sequences, 1))
+
+
+def _draw_sites(rng, replicates, length, rate, n_mutations):
+    """Flat (replicate * length + position) indices of mutated sites, sorted."""
+    total = replicates * length
+    if n_mutations is not None:
+        n = min(int(n_mutations), length)
+        if n <= 0:
+            return np.empty(0, dtype=np.int64)
+        cols = _distinct_columns(rng, replicates, length, n)
+        return (np.arange(replicates)[:, None] * length + cols).ravel()
+    if rate <= 0:
+        return np.empty(0, dtype=np.int64)
+    if rate >= 1:
+        return np.arange(total, dtype=np.int64)
+    # Independent per-base Bernoulli trials: the gaps between hits are
+    # geometric, so only the hits themselves are ever drawn (O(k) memory)
+    chunks, last = [], -1
+    while last < total:
+        gaps = rng.geometric(rate, size=int(1.1 * (total - last) * rate) + 64)
+        hits = last + np.cumsum(gaps)
+        chunks.append(hits)
+        last = int(hits[-1])
+    sites = np.concatenate(chunks)
+    return sites[sites < total]
+
+
+def _distinct_columns(rng, replicates, length, n):
+    """(replicates, n) sorted distinct positions in [0, length) per row, in O(replicates * n) memory."""
+    if 4 * n > length:
+        # Dense case: a full permutation per row is cheap relative to n
+        return np.sort(np.stack([rng.choice(length, n, replace=False) for _ in range(replicates)]), axis=1)
+    # Sparse case: draw with replacement and redraw collisions until every row is distinct
+    cols = np.sort(rng.integers(0, length, size=(replicates, n)), axis=1)
+    while True:
+        dup = np.zeros(cols.shape, dtype=bool)
+        dup[:, 1:] = cols[:, 1:] == cols[:, :-1]
+        if not dup.any():
+            return cols
+        cols[dup] = rng.integers(0, length, size=int(dup.sum()))
+        cols.sort(axis=1)
+
+
+def simulate_mutants(seq, replicates=1, rate=None, n_mutations=None, indel_fraction=0.0,
+                     transition_prob=1 / 3, seed=None):
+    """Generate ``replicates`` mutants of a cleaned A/C/G/T sequence.
+
+    Give either a per-base ``rate`` or a fixed ``n_mutations`` per replicate.
+    A fraction ``indel_fraction`` of events become single-base insertions or
+    deletions (half each); the rest are substitutions, which are transitions
+    with probability ``transition_prob`` (1/3 = uniform over the other bases).
+    """
+    if (rate is None) == (n_mutations is None):
+        raise ValueError("Specify exactly one of rate or n_mutations.")
+    rng = np.random.default_rng(seed)
+    ref = np.frombuffer(seq.encode("ascii") if isinstance(seq, str) else bytes(seq), dtype=np.uint8)
+    if np.any(_CODE[ref] == 255):
+        raise ValueError("Sequence must contain only A, C, G and T (clean it first).")
+    length = len(ref)
+    if length == 0:
+        raise ValueError("Sequence is empty.")
+    if replicates * length > MAX_LIBRARY_BASES:
+        raise ValueError(
+            f"{replicates:,} replicates of {length:,} bp exceed the {MAX_LIBRARY_BASES:,}-base library limit; "
+            f"use at most {max(1, MAX_LIBRARY_BASES // length):,} replicates."
+        )
+
+    sites = _draw_sites(rng, replicates, length, rate, n_mutations)
+    rep, pos = np.divmod(sites, length)
+    k = len(sites)
+
+    kind = rng.random(k)
+    is_indel = kind < indel_fraction
+    is_ins = is_indel & (kind < indel_fraction / 2)
+    is_del = is_indel & ~is_ins
+    is_sub = ~is_indel
+
+    # --- substitutions: transition vs transversion chosen in code space ---
+    old_codes = _CODE[ref[pos]]
+    is_ts = rng.random(k) < transition_prob
+    xor = np.where(is_ts, _TRANSITION_XOR, _TRANSVERSION_XOR[rng.integers(0, 2, size=k)]).astype(np.uint8)
+    sub_bases = BASES[old_codes ^ xor]
+    ins_bases = BASES[rng.integers(0, 4, size=k)]
+
+    library = np.tile(ref, (replicates, 1))
+    library.ravel()[sites[is_sub]] = sub_bases[is_sub]
+
+    if is_indel.any():
+        # Flatten, drop deleted sites and insert new bases before insertion sites
+        # in a single delete/insert each, then split back into replicates
+        flat = library.ravel()
+        keep = np.ones(flat.size, dtype=bool)
+        keep[sites[is_del]] = False
+        shift = np.cumsum(~keep)
+        kept = flat[keep]
+        ins_at = sites[is_ins] - shift[sites[is_ins]]
+        flat = np.insert(kept, ins_at, ins_bases[is_ins])
+        lengths = length - np.bincount(rep[is_del], minlength=replicates) + np.bincount(rep[is_ins], minlength=replicates)
+        rows = np.split(flat, np.cumsum(lengths)[:-1])
+    else:
+        rows = list(library)
+    sequences = [row.tobytes().decode("ascii") for row in rows]
+
+    types = np.where(is_sub, SUBSTITUTION, np.where(is_ins, INSERTION, DELETION))
+    ref_col = np.where(is_ins, "-", ref[pos].view("S1").astype(str))
+    alt_col = np.where(is_sub, sub_bases.view("S1").astype(str), np.where(is_ins, ins_bases.view("S1").astype(str), "-"))
+    classes = np.where(is_sub, np.where(is_ts, "transition", "transversion"), "indel")
+    events = {"replicate": rep, "position": pos, "type": types, "ref": ref_col, "alt": alt_col, "class": classes}
+    return MutantLibrary(sequences, events)
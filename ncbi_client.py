@@ -0,0 +1,143 @@
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from fetch_cache import DEFAULT_TIMEOUT, USER_AGENT, CachedFetcher, TTLCache, normalize_query
+
+# =========================
+# NCBI E-UTILITIES CLIENT
+# =========================
+# One pooled session shared by every user of the app. Requests go through a
+# token bucket sized to NCBI's limits (3/s, or 10/s with an API key), transient
+# failures are retried with exponential backoff, and a search is exactly two
+# calls: esearch for the IDs, then one batched esummary for all their titles.
+# Results land in the same persistent TTL cache as the Wikipedia lookups.
+
+EUTILS_URL = os.environ.get("NCBI_EUTILS_URL", "https://eutils.ncbi.nlm.nih.gov/entrez/eutils")
+DEFAULT_NCBI_CACHE_PATH = "cache/ncbi_cache.json"
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# esummary accepts long ID lists; keep each request's URL comfortably short
+ESUMMARY_BATCH = 200
+
+
+class TokenBucket:
+    """Blocking rate limiter: ``rate`` tokens per second, bursts up to ``capacity``."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def _record_summary(db, uid, doc):
+    """Title / one-line detail for an esummary document of any supported database."""
+    if db == "pubmed":
+        authors = ", ".join(a.get("name", "") for a in doc.get("authors", [])[:3])
+        detail = " · ".join(x for x in (authors, doc.get("source", ""), doc.get("pubdate", "")) if x)
+        title = doc.get("title", "")
+    elif db == "gene":
+        organism = doc.get("organism", {}).get("scientificname", "")
+        title = f"{doc.get('name', '')} – {doc.get('description', '')}".strip(" –")
+        detail = " · ".join(x for x in (organism, doc.get("chromosome", "") and f"chr {doc['chromosome']}") if x)
+    else:
+        title = doc.get("title", "")
+        length = doc.get("slen")
+        detail = " · ".join(x for x in (doc.get("caption", ""), length and f"{length} aa") if x)
+    return {
+        "id": uid,
+        "title": title or f"Record {uid}",
+        "detail": detail,
+        "url": f"https://www.ncbi.nlm.nih.gov/{db}/{uid}",
+    }
+
+
+class NCBIClient:
+    def __init__(self, api_key=None, email=None, base_url=EUTILS_URL,
+                 cache_path=DEFAULT_NCBI_CACHE_PATH, timeout=DEFAULT_TIMEOUT, retries=3, backoff=0.5,
+                 max_backoff=5.0):
+        self.api_key = api_key if api_key is not None else os.environ.get("NCBI_API_KEY")
+        self.email = email if email is not None else os.environ.get("NCBI_EMAIL")
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        # Longest single wait; a longer Retry-After fails the call instead of blocking a worker
+        self.max_backoff = max_backoff
+        self.limiter = TokenBucket(10 if self.api_key else 3)
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.fetcher = CachedFetcher(self._search_uncached, TTLCache(cache_path))
+
+    def _get(self, endpoint, params):
+        params = {**params, "retmode": "json", "tool": "bio-concepts-simplified"}
+        if self.api_key:
+            params["api_key"] = self.api_key
+        if self.email:
+            params["email"] = self.email
+        url = f"{self.base_url}/{endpoint}"
+        for attempt in range(self.retries + 1):
+            self.limiter.acquire()
+            try:
+                resp = self.session.get(url, params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.retries:
+                    raise
+                time.sleep(min(self.backoff * 2 ** attempt, self.max_backoff))
+                continue
+            if resp.status_code in RETRY_STATUSES and attempt < self.retries:
+                retry_after = resp.headers.get("Retry-After", "")
+                wait = float(retry_after) if retry_after.isdigit() else self.backoff * 2 ** attempt
+                if retry_after.isdigit() and wait > self.max_backoff:
+                    # Raises the retryable HTTPError (429/503) rather than sleeping that long
+                    resp.raise_for_status()
+                time.sleep(min(wait, self.max_backoff))
+                continue
+            resp.raise_for_status()
+            return resp.json()
+
+    def esearch(self, db, term, retmax=5):
+        data = self._get("esearch.fcgi", {"db": db, "term": term, "retmax": retmax})
+        return data.get("esearchresult", {}).get("idlist", [])
+
+    def esummary(self, db, ids):
+        """{uid: document} for many IDs, one request per ESUMMARY_BATCH IDs."""
+        docs = {}
+        for i in range(0, len(ids), ESUMMARY_BATCH):
+            batch = ids[i:i + ESUMMARY_BATCH]
+            result = self._get("esummary.fcgi", {"db": db, "id": ",".join(batch)}).get("result", {})
+            docs.update({uid: result[uid] for uid in result.get("uids", batch) if uid in result})
+        return docs
+
+    def _search_uncached(self, query):
+        db, term, retmax = query
+        ids = self.esearch(db, term, retmax)
+        if not ids:
+            return []
+        docs = self.esummary(db, ids)
+        return [_record_summary(db, uid, docs.get(uid, {})) for uid in ids]
+
+    def search(self, db, term, retmax=5):
+        """[{"id", "title", "detail", "url"}] for the top ``retmax`` records of ``term``."""
+        key = f"{db}|{retmax}|{normalize_query(term)}"
+        return self.fetcher.get((db, term, retmax), key=key)
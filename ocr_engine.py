@@ -0,0 +1,246 @@
+import argparse
+import csv
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+DEFAULT_STORE_PATH = os.path.join("cache", "ocr_index.json")
+
+# =========================
+# OCR SERVICE
+# =========================
+# EasyOCR pulls in torch and loads detection/recognition weights when the
+# Reader is built, which takes several seconds. The service below defers that
+# work until it is actually needed (or until warm() is called after the first
+# render) so that cold starts only pay for the UI.
+
+
+class OCRService:
+    """Lazily constructed EasyOCR reader with a background warm-up."""
+
+    def __init__(self, languages=("en",)):
+        self.languages = list(languages)
+        self.error = None
+        self._reader = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def ready(self):
+        return self._reader is not None
+
+    @property
+    def warming(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def warm(self):
+        """Start loading the model in a daemon thread (no-op if already started)."""
+        if self.ready or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._warm, name="ocr-warmup", daemon=True)
+        self._thread.start()
+
+    def _warm(self):
+        try:
+            self._load()
+        except Exception as e:
+            self.error = e
+
+    def _load(self):
+        if self._reader is None:
+            with self._lock:
+                if self._reader is None:
+                    import easyocr
+                    self._reader = easyocr.Reader(self.languages)
+        return self._reader
+
+    def readtext(self, img_path):
+        """Return the detected text fragments of an image (blocks until the model is loaded)."""
+        return self._load().readtext(img_path, detail=0)
+
+
+# =========================
+# PERSISTENT OCR TEXT STORE
+# =========================
+# OCR output is kept on disk so restarts and new workers do not re-run EasyOCR
+# over every diagram. Entries are keyed by image path and validated against the
+# file's mtime/size and, when those change, its content hash.
+
+
+def file_digest(path, chunk_size=1 << 20):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class OCRTextStore:
+    """JSON-backed map of image path -> OCR text, invalidated when the image changes."""
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = self._read()
+
+    def _read(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _key(self, img_path):
+        return os.path.normpath(img_path)
+
+    def lookup(self, img_path):
+        """Return the stored text for an unchanged image, or None if it must be (re-)OCR'd."""
+        key = self._key(img_path)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        try:
+            st = os.stat(img_path)
+        except OSError:
+            return None
+        if entry.get("mtime") == st.st_mtime and entry.get("size") == st.st_size:
+            return entry.get("text", "")
+        # Touched but possibly identical (e.g. a fresh checkout): compare contents
+        if entry.get("sha1") == file_digest(img_path):
+            with self._lock:
+                entry["mtime"], entry["size"] = st.st_mtime, st.st_size
+                self._save()
+            return entry.get("text", "")
+        return None
+
+    def put(self, img_path, text, save=True):
+        st = os.stat(img_path)
+        entry = {"sha1": file_digest(img_path), "mtime": st.st_mtime, "size": st.st_size, "text": text}
+        with self._lock:
+            self._entries[self._key(img_path)] = entry
+            if save:
+                self._save()
+
+    def save(self):
+        with self._lock:
+            self._save()
+
+    def _save(self):
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+
+def ocr_image_text(service, img_path):
+    """OCR one image into the lower-cased, space-joined form the search uses."""
+    return " ".join(service.readtext(img_path)).lower()
+
+
+def image_paths_from_csv(csv_path, column="Image"):
+    paths = []
+    with open(csv_path, newline="", encoding="utf-8-sig") as f:
+        for row in csv.DictReader(f):
+            row = {(k or "").strip(): v for k, v in row.items()}
+            img_path = (row.get(column) or "").strip()
+            if img_path and img_path not in paths:
+                paths.append(img_path)
+    return paths
+
+
+# =========================
+# BATCH OCR
+# =========================
+# Rebuilding the store for many diagrams is spread over a process pool; each
+# worker loads its own EasyOCR model once and results are written back to the
+# shared store as they complete.
+
+_worker_service = None
+
+
+def _init_worker(languages):
+    global _worker_service
+    # One torch thread per process, otherwise N workers each grab every core
+    os.environ.setdefault("OMP_NUM_THREADS", "1")
+    _worker_service = OCRService(languages)
+
+
+def _ocr_worker(img_path):
+    return img_path, ocr_image_text(_worker_service, img_path)
+
+
+def batch_ocr(img_paths, store, workers=1, service=None, languages=("en",), progress=None, save_every=25):
+    """OCR every new or changed image into ``store``.
+
+    ``workers`` > 1 uses a process pool (spawned, so it is safe to call from a
+    server thread); otherwise ``service`` (or a fresh one) runs in-process.
+    ``progress(done, total, img_path)`` is called after each image.
+    Returns the list of paths that failed.
+    """
+    todo = [p for p in dict.fromkeys(img_paths) if os.path.exists(p) and store.lookup(p) is None]
+    failed = []
+    if not todo:
+        return failed
+
+    def record(done, img_path, text):
+        if text is None:
+            failed.append(img_path)
+        else:
+            store.put(img_path, text, save=done % save_every == 0)
+        if progress is not None:
+            progress(done, len(todo), img_path)
+
+    if workers is None or workers > 1:
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_worker, initargs=(list(languages),)) as pool:
+            futures = {pool.submit(_ocr_worker, p): p for p in todo}
+            for done, future in enumerate(as_completed(futures), 1):
+                try:
+                    img_path, text = future.result()
+                except Exception:
+                    img_path, text = futures[future], None
+                record(done, img_path, text)
+    else:
+        service = service or OCRService(languages)
+        for done, img_path in enumerate(todo, 1):
+            try:
+                text = ocr_image_text(service, img_path)
+            except Exception:
+                text = None
+            record(done, img_path, text)
+
+    store.save()
+    return failed
+
+
+def build_index(csv_paths, store, workers=None):
+    """Offline step: OCR every new or changed diagram referenced by the CSVs."""
+    img_paths = []
+    for csv_path in csv_paths:
+        if os.path.exists(csv_path):
+            img_paths.extend(image_paths_from_csv(csv_path))
+
+    def report(done, total, img_path):
+        print(f"[{done}/{total}] {img_path}")
+
+    failed = batch_ocr(img_paths, store, workers=workers, progress=report)
+    for img_path in failed:
+        print(f"FAILED {img_path}")
+    return failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-compute OCR text for knowledge base diagrams.")
+    parser.add_argument("csv", nargs="*", default=["knowledge_base.csv", "knowledge.csv"])
+    parser.add_argument("--store", default=DEFAULT_STORE_PATH)
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="OCR processes (default: all cores)")
+    args = parser.parse_args()
+    failed = build_index(args.csv, OCRTextStore(args.store), workers=args.workers)
+    raise SystemExit(1 if failed else 0)
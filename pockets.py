@@ -0,0 +1,207 @@
+import numpy as np
+
+from structure_store import WATER_NAMES
+
+# =========================
+# SPATIAL GRID INDEX
+# =========================
+# Atoms are bucketed into cubic cells of the query radius, so a radius search
+# only looks at the 27 surrounding cells. Cells are found by binary search on
+# the sorted cell keys, and all candidate pairs are generated with array
+# arithmetic: the cost grows with the number of close pairs, not n².
+
+_OFFSETS = np.array([(i, j, k) for i in (-1, 0, 1) for j in (-1, 0, 1) for k in (-1, 0, 1)])
+_SHIFT = 21
+_BIAS = 1 << (_SHIFT - 1)
+
+
+def _pack(cells):
+    cells = cells.astype(np.int64) + _BIAS
+    return (cells[:, 0] << (2 * _SHIFT)) | (cells[:, 1] << _SHIFT) | cells[:, 2]
+
+
+class GridIndex:
+    """Uniform-grid neighbour index over a fixed set of 3D points."""
+
+    def __init__(self, coords, cell):
+        self.coords = np.asarray(coords, dtype=np.float32)
+        self.cell = float(cell)
+        keys = _pack(np.floor(self.coords / self.cell))
+        self.order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[self.order]
+        self.cell_keys, self.cell_start, self.cell_count = np.unique(sorted_keys, return_index=True, return_counts=True)
+
+    def pairs(self, points, radius=None, chunk=20_000):
+        """(point index, indexed atom index) for every pair closer than ``radius`` (<= cell)."""
+        radius = self.cell if radius is None else radius
+        if radius > self.cell:
+            raise ValueError("Query radius must not exceed the grid cell size.")
+        points = np.asarray(points, dtype=np.float32)
+        out_p, out_a = [], []
+        for lo in range(0, len(points), chunk):
+            block = points[lo:lo + chunk]
+            base = np.floor(block / self.cell).astype(np.int64)
+            for offset in _OFFSETS:
+                keys = _pack(base + offset)
+                slot = np.searchsorted(self.cell_keys, keys)
+                slot = np.minimum(slot, len(self.cell_keys) - 1)
+                hit = self.cell_keys[slot] == keys
+                if not hit.any():
+                    continue
+                pts = np.flatnonzero(hit)
+                starts = self.cell_start[slot[hit]]
+                counts = self.cell_count[slot[hit]]
+                # Expand every (point, cell) hit into one row per atom in that cell
+                p_idx = np.repeat(pts, counts)
+                within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+                a_idx = self.order[np.repeat(starts, counts) + within]
+                d2 = ((block[p_idx] - self.coords[a_idx]) ** 2).sum(axis=1)
+                close = d2 <= radius * radius
+                out_p.append(p_idx[close] + lo)
+                out_a.append(a_idx[close])
+        if not out_p:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        return np.concatenate(out_p), np.concatenate(out_a)
+
+    def count_within(self, points, radius=None):
+        p_idx, _ = self.pairs(points, radius)
+        return np.bincount(p_idx, minlength=len(points))
+
+
+# =========================
+# POCKET DETECTION
+# =========================
+# 1. Ligand mode: residues with any atom within CONTACT_RADIUS of a bound
+#    HETATM ligand (waters, ions and crystallization additives ignored).
+# 2. Grid mode (apo structures): LIGSITE-style scan; empty grid points enclosed
+#    by protein along most directions are cavity points, and connected
+#    clusters of them are pockets.
+
+CONTACT_RADIUS = 4.5
+MIN_LIGAND_ATOMS = 6
+ADDITIVES = {
+    b"SO4", b"PO4", b"GOL", b"EDO", b"PEG", b"PG4", b"PGE", b"ACT", b"DMS", b"MPD",
+    b"FMT", b"TRS", b"EPE", b"MES", b"CIT", b"IMD", b"BME", b"NO3", b"ACE", b"NH2",
+}
+
+GRID_SPACING = 1.0
+MAX_GRID_POINTS = 2_000_000
+PROBE_CLEARANCE = 3.0
+BURIAL_RADIUS = 8.0
+# Lines (of 7: the 3 axes and 4 body diagonals) that must hit protein on both sides
+MIN_PSP = 6
+_LINES = np.array([(1, 0, 0), (0, 1, 0), (0, 0, 1), (1, 1, 1), (1, 1, -1), (1, -1, 1), (-1, 1, 1)])
+MIN_POCKET_POINTS = 10
+MAX_POCKETS = 3
+
+
+def _residue_list(atoms, idx):
+    """Unique (chain, resseq, resname) for atom indices, in chain/sequence order."""
+    sel = atoms[np.unique(idx)]
+    residues = {(c.decode(), int(r), n.decode()) for c, r, n in zip(sel["chain"], sel["resseq"], sel["resname"])}
+    return sorted(residues, key=lambda res: (res[0], res[1]))
+
+
+def ligand_pockets(atoms, radius=CONTACT_RADIUS):
+    polymer_idx = np.flatnonzero(~atoms["hetatm"])
+    het = atoms["hetatm"] & ~np.isin(atoms["resname"], list(WATER_NAMES)) & ~np.isin(atoms["resname"], list(ADDITIVES))
+    if not het.any() or not len(polymer_idx):
+        return []
+    index = GridIndex(atoms["xyz"][polymer_idx], radius)
+    het_idx = np.flatnonzero(het)
+    groups = {}
+    for i in het_idx:
+        a = atoms[i]
+        groups.setdefault((a["chain"], int(a["resseq"]), a["resname"]), []).append(i)
+    pockets = []
+    for (chain, resseq, resname), members in groups.items():
+        if len(members) < MIN_LIGAND_ATOMS:
+            continue
+        _, hits = index.pairs(atoms["xyz"][members], radius)
+        if len(hits):
+            pockets.append({
+                "label": f"{resname.decode()} {chain.decode()}{resseq}",
+                "residues": _residue_list(atoms, polymer_idx[hits]),
+            })
+    return pockets
+
+
+def _label_clusters(cells):
+    """Connected components of integer grid cells (6-neighbourhood) by min-label propagation."""
+    keys = _pack(cells)
+    order = np.argsort(keys)
+    sorted_keys = keys[order]
+    labels = np.arange(len(cells))
+    neighbours = []
+    for step in np.eye(3, dtype=np.int64):
+        nk = _pack(cells + step)
+        slot = np.minimum(np.searchsorted(sorted_keys, nk), len(keys) - 1)
+        found = sorted_keys[slot] == nk
+        neighbours.append((np.flatnonzero(found), order[slot[found]]))
+    while True:
+        before = labels.copy()
+        for a, b in neighbours:
+            low = np.minimum(labels[a], labels[b])
+            np.minimum.at(labels, a, low)
+            np.minimum.at(labels, b, low)
+        labels = labels[labels]
+        if np.array_equal(labels, before):
+            return labels
+
+
+def grid_pockets(atoms, spacing=GRID_SPACING):
+    heavy_idx = np.flatnonzero(~atoms["hetatm"] & ~np.isin(atoms["element"], [b"H", b"D"]))
+    if len(heavy_idx) < 20:
+        return []
+    xyz = atoms["xyz"][heavy_idx]
+    lo, hi = xyz.min(axis=0), xyz.max(axis=0)
+    # Coarser grid for very large assemblies so the point count stays bounded
+    spacing = max(spacing, float(np.prod(hi - lo + spacing) / MAX_GRID_POINTS) ** (1 / 3))
+    axes = [np.arange(lo[d], hi[d] + spacing, spacing, dtype=np.float32) for d in range(3)]
+    shape = tuple(len(a) for a in axes)
+    grid = np.stack(np.meshgrid(*axes, indexing="ij"), axis=-1).reshape(-1, 3)
+
+    # Occupied: an atom centre within the probe clearance
+    occupied = (GridIndex(xyz, PROBE_CLEARANCE).count_within(grid) > 0).reshape(shape)
+
+    # LIGSITE buriedness: along how many of 7 lines is an empty point enclosed
+    # by protein on both sides within BURIAL_RADIUS (shifted-slice lookups)
+    reach = max(1, int(round(BURIAL_RADIUS / spacing)))
+    padded = np.pad(occupied, reach)
+    psp = np.zeros(shape, dtype=np.int8)
+    for line in _LINES:
+        forward = np.zeros(shape, dtype=bool)
+        backward = np.zeros(shape, dtype=bool)
+        for k in range(1, reach + 1):
+            for sign, hits in ((1, forward), (-1, backward)):
+                start = reach + sign * k * line
+                hits |= padded[start[0]:start[0] + shape[0], start[1]:start[1] + shape[1], start[2]:start[2] + shape[2]]
+        psp += forward & backward
+    cavity_cells = np.argwhere(~occupied & (psp >= MIN_PSP))
+    if not len(cavity_cells):
+        return []
+
+    labels = _label_clusters(cavity_cells)
+    ids, sizes = np.unique(labels, return_counts=True)
+    ranked = ids[np.argsort(-sizes)]
+    contact = GridIndex(xyz, CONTACT_RADIUS)
+    pockets = []
+    for rank, cid in enumerate(ranked[:MAX_POCKETS], 1):
+        cells = cavity_cells[labels == cid]
+        if len(cells) < MIN_POCKET_POINTS:
+            break
+        points = lo + cells.astype(np.float32) * spacing
+        _, hits = contact.pairs(points, CONTACT_RADIUS)
+        pockets.append({
+            "label": f"Cavity {rank} (~{len(cells) * spacing ** 3:.0f} Å³)",
+            "residues": _residue_list(atoms, heavy_idx[hits]),
+        })
+    return pockets
+
+
+def find_pockets(atoms):
+    """{"method": "ligand" | "grid", "pockets": [{"label", "residues"}]} for an atom table."""
+    pockets = ligand_pockets(atoms)
+    if pockets:
+        return {"method": "ligand", "pockets": pockets}
+    return {"method": "grid", "pockets": grid_pockets(atoms)}
@@ -0,0 +1,310 @@
+import argparse
+import csv
+import os
+import sys
+
+import numpy as np
+
+from seq_core import N, encode, reverse_complement
+from seq_io import clean_dna
+
+# =========================
+# PRIMER THERMODYNAMICS
+# =========================
+# Nearest-neighbour stacks are indexed by 4*b1 + b2 in seq_core code space
+# (A=0, C=1, G=2, T=3), so the SantaLucia tables are plain 16-entry arrays and
+# the Tm of a whole primer plate is a handful of bincounts over the
+# concatenated sequences instead of a Python loop per dinucleotide.
+
+# SantaLucia (1998) unified parameters: dH in kcal/mol, dS in cal/(K*mol)
+_NN_PARAMS = {
+    "AA": (-7.9, -22.2), "TT": (-7.9, -22.2),
+    "AT": (-7.2, -20.4), "TA": (-7.2, -21.3),
+    "CA": (-8.5, -22.7), "TG": (-8.5, -22.7),
+    "GT": (-8.4, -22.4), "AC": (-8.4, -22.4),
+    "CT": (-7.8, -21.0), "AG": (-7.8, -21.0),
+    "GA": (-8.2, -22.2), "TC": (-8.2, -22.2),
+    "CG": (-10.6, -27.2), "GC": (-9.8, -24.4),
+    "GG": (-8.0, -19.9), "CC": (-8.0, -19.9),
+}
+NN_DH = np.zeros(16)
+NN_DS = np.zeros(16)
+for _pair, (_dh, _ds) in _NN_PARAMS.items():
+    _i = 4 * "ACGT".index(_pair[0]) + "ACGT".index(_pair[1])
+    NN_DH[_i], NN_DS[_i] = _dh, _ds
+
+# Duplex initiation, per terminal base pair (indexed by code: A, C, G, T)
+INIT_DH = np.array([2.3, 0.1, 0.1, 2.3])
+INIT_DS = np.array([4.1, -2.8, -2.8, 4.1])
+SYMMETRY_DS = -1.4
+
+R = 1.987  # cal/(K*mol)
+T37 = 310.15
+NN_DG37 = NN_DH - T37 * NN_DS / 1000.0
+
+DEFAULT_PRIMER_NM = 50.0
+DEFAULT_NA_MM = 50.0
+
+# Shortest loop a hairpin can close
+MIN_HAIRPIN_LOOP = 3
+
+
+def _encode_primer(primer):
+    codes = encode(clean_dna(primer))
+    if not len(codes):
+        raise ValueError(f"Primer {primer!r} contains no A/C/G/T bases.")
+    return codes
+
+
+def melting_temperatures(primers, primer_nm=DEFAULT_PRIMER_NM, na_mm=DEFAULT_NA_MM):
+    """Nearest-neighbour Tm (deg C) of many primers at once.
+
+    All primers are concatenated into one code array; stack indices are formed
+    with one shifted add and summed per primer with weighted bincounts.
+    """
+    encoded = [_encode_primer(p) for p in primers]
+    if not encoded:
+        return np.empty(0)
+    lengths = np.array([len(c) for c in encoded])
+    codes = np.concatenate(encoded).astype(np.intp)
+    owner = np.repeat(np.arange(len(encoded)), lengths)
+    ends = np.cumsum(lengths)
+    starts = ends - lengths
+
+    # A stack spans positions i, i+1 of the same primer
+    same = owner[:-1] == owner[1:]
+    stack = 4 * codes[:-1][same] + codes[1:][same]
+    stack_owner = owner[:-1][same]
+    dh = np.bincount(stack_owner, weights=NN_DH[stack], minlength=len(encoded))
+    ds = np.bincount(stack_owner, weights=NN_DS[stack], minlength=len(encoded))
+    dh += INIT_DH[codes[starts]] + INIT_DH[codes[ends - 1]]
+    ds += INIT_DS[codes[starts]] + INIT_DS[codes[ends - 1]]
+
+    self_comp = np.array([np.array_equal(c, reverse_complement(c)) for c in encoded])
+    ds += np.where(self_comp, SYMMETRY_DS, 0.0)
+    ds += 0.368 * (lengths - 1) * np.log(na_mm / 1000.0)
+    ct = primer_nm * 1e-9
+    ds_total = ds + R * np.log(np.where(self_comp, ct, ct / 4))
+    return dh * 1000.0 / ds_total - 273.15
+
+
+def melting_temperature(primer, primer_nm=DEFAULT_PRIMER_NM, na_mm=DEFAULT_NA_MM):
+    return float(melting_temperatures([primer], primer_nm, na_mm)[0])
+
+
+def gc_percent(primer):
+    codes = _encode_primer(primer)
+    return float(np.count_nonzero((codes == 1) | (codes == 2)) / len(codes) * 100)
+
+
+# =========================
+# SECONDARY STRUCTURE SCORES
+# =========================
+
+def _best_duplex(a, b, mask=None):
+    """Most stable contiguous duplex (dG37, kcal/mol; 0 = none) between a and b antiparallel.
+
+    Row i of the pairing matrix compares a[i] with b read 3'->5'; a contiguous
+    duplex is a run along a diagonal, accumulated one row at a time.
+    """
+    b_rev = b[::-1]
+    pairs = (a[:, None] + b_rev[None, :] == 3) & (a[:, None] != N) & (b_rev[None, :] != N)
+    if mask is not None:
+        pairs &= mask
+    best = 0.0
+    run = np.zeros(len(b_rev))
+    for i in range(1, len(a)):
+        stacked = pairs[i, 1:] & pairs[i - 1, :-1]
+        if a[i - 1] == N or a[i] == N:
+            stacked[:] = False
+        energy = NN_DG37[4 * int(a[i - 1]) + int(a[i])] if stacked.any() else 0.0
+        nxt = np.zeros(len(b_rev))
+        nxt[1:] = np.where(stacked, run[:-1] + energy, 0.0)
+        run = nxt
+        if len(run):
+            best = min(best, float(run.min()))
+    return best
+
+
+def self_dimer_dg(primer):
+    codes = _encode_primer(primer)
+    return _best_duplex(codes, codes)
+
+
+def cross_dimer_dg(primer_a, primer_b):
+    return _best_duplex(_encode_primer(primer_a), _encode_primer(primer_b))
+
+
+def hairpin_dg(primer):
+    """Stem dG37 of the most stable hairpin (loop of at least MIN_HAIRPIN_LOOP bases)."""
+    codes = _encode_primer(primer)
+    n = len(codes)
+    i = np.arange(n)[:, None]
+    partner = n - 1 - np.arange(n)[None, :]
+    return _best_duplex(codes, codes, mask=(partner - i) > MIN_HAIRPIN_LOOP)
+
+
+# =========================
+# IN-SILICO PCR
+# =========================
+
+def binding_sites(template_codes, primer_codes, max_mismatches=0):
+    """Start positions where the primer matches the template with few mismatches.
+
+    Mismatches are counted with one vector comparison per primer base, so memory
+    stays O(template) however long the primer is.
+    """
+    n, k = len(template_codes), len(primer_codes)
+    if k > n:
+        return np.empty(0, dtype=np.int64)
+    windows = n - k + 1
+    mismatches = np.zeros(windows, dtype=np.int32)
+    for offset, base in enumerate(primer_codes):
+        mismatches += template_codes[offset:offset + windows] != base
+    return np.flatnonzero(mismatches <= max_mismatches)
+
+
+def find_amplicons(template, forward, reverse, max_mismatches=0, max_size=5000):
+    """PCR products of a primer pair on a linear template (either primer may prime either strand).
+
+    ``template`` may be a sequence or an already encoded code array. Returns
+    dicts with 1-based inclusive coordinates on the template.
+    """
+    t = template if isinstance(template, np.ndarray) else encode(clean_dna(template))
+    primers = {"F": _encode_primer(forward), "R": _encode_primer(reverse)}
+    plus, minus = [], []
+    for name, codes in primers.items():
+        plus += [(int(s), name, len(codes)) for s in binding_sites(t, codes, max_mismatches)]
+        rc = reverse_complement(codes)
+        minus += [(int(s) + len(codes), name) for s in binding_sites(t, rc, max_mismatches)]
+    if not plus or not minus:
+        return []
+    minus.sort()
+    minus_ends = np.array([end for end, _ in minus])
+    products = []
+    for start, left, k in plus:
+        lo = np.searchsorted(minus_ends, start + k, side="left")
+        hi = np.searchsorted(minus_ends, start + max_size, side="right")
+        for end, right in minus[lo:hi]:
+            products.append({
+                "Start": start + 1,
+                "End": end,
+                "Size (bp)": end - start,
+                "Primers": f"{left}/{right}",
+            })
+    products.sort(key=lambda p: (p["Start"], p["Size (bp)"]))
+    return products
+
+
+# =========================
+# PLATE SCREENING
+# =========================
+
+SCREEN_FIELDS = [
+    "name", "forward", "reverse", "tm_forward", "tm_reverse", "tm_delta",
+    "gc_forward", "gc_reverse", "hairpin_dg", "self_dimer_dg", "cross_dimer_dg",
+    "amplicons", "product_bp", "error",
+]
+
+# Shorter "primers" have no meaningful nearest-neighbour Tm
+MIN_PRIMER_BASES = 6
+
+
+def primer_error(primer):
+    """Why ``primer`` cannot be screened, or None if it can."""
+    n = len(clean_dna(primer or ""))
+    if not n:
+        return f"{primer!r} contains no A/C/G/T bases"
+    if n < MIN_PRIMER_BASES:
+        return f"{primer!r} is shorter than {MIN_PRIMER_BASES} bases"
+    return None
+
+
+def screen_pairs(pairs, template=None, primer_nm=DEFAULT_PRIMER_NM, na_mm=DEFAULT_NA_MM,
+                 max_mismatches=0, max_size=5000):
+    """Screen (name, forward, reverse) primer pairs; Tm for the whole plate is one vectorized call.
+
+    Rows whose primers cannot be screened get an ``error`` and empty metrics
+    instead of aborting the plate.
+    """
+    pairs = list(pairs)
+    if template is not None and not isinstance(template, np.ndarray):
+        template = encode(clean_dna(template))
+    errors = ["; ".join(e for e in (primer_error(f), primer_error(r)) if e) or None for _, f, r in pairs]
+    valid = [i for i, e in enumerate(errors) if e is None]
+    tms = melting_temperatures([p for i in valid for p in pairs[i][1:]], primer_nm, na_mm)
+    tm_of = {i: (tms[2 * k], tms[2 * k + 1]) for k, i in enumerate(valid)}
+    rows = []
+    for i, (name, forward, reverse) in enumerate(pairs):
+        if errors[i] is not None:
+            row = dict.fromkeys(SCREEN_FIELDS)
+            row.update(name=name, forward=forward, reverse=reverse, error=errors[i])
+            rows.append(row)
+            continue
+        tm_f, tm_r = tm_of[i]
+        row = {
+            "name": name,
+            "forward": clean_dna(forward),
+            "reverse": clean_dna(reverse),
+            "tm_forward": round(float(tm_f), 1),
+            "tm_reverse": round(float(tm_r), 1),
+            "tm_delta": round(float(abs(tm_f - tm_r)), 1),
+            "gc_forward": round(gc_percent(forward), 1),
+            "gc_reverse": round(gc_percent(reverse), 1),
+            "hairpin_dg": round(min(hairpin_dg(forward), hairpin_dg(reverse)), 2),
+            "self_dimer_dg": round(min(self_dimer_dg(forward), self_dimer_dg(reverse)), 2),
+            "cross_dimer_dg": round(cross_dimer_dg(forward, reverse), 2),
+            "amplicons": None,
+            "product_bp": None,
+            "error": None,
+        }
+        if template is not None and len(template):
+            products = find_amplicons(template, forward, reverse, max_mismatches, max_size)
+            row["amplicons"] = len(products)
+            row["product_bp"] = products[0]["Size (bp)"] if len(products) == 1 else None
+        rows.append(row)
+    return rows
+
+
+def read_plate(source):
+    """(name, forward, reverse) rows from a CSV path or open text file (header optional)."""
+    own = isinstance(source, (str, os.PathLike))
+    f = open(source, newline="", encoding="utf-8-sig") if own else source
+    try:
+        rows = [r for r in csv.reader(f) if r and any(cell.strip() for cell in r)]
+    finally:
+        if own:
+            f.close()
+    if rows and [c.strip().lower() for c in rows[0][:3]] == ["name", "forward", "reverse"]:
+        rows = rows[1:]
+    return [(r[0].strip(), r[1].strip(), r[2].strip()) for r in rows if len(r) >= 3]
+
+
+if __name__ == "__main__":
+    from seq_io import iter_records
+
+    parser = argparse.ArgumentParser(description="Tm, hairpin/dimer scores and in-silico PCR for a primer plate.")
+    parser.add_argument("plate", help="CSV with name,forward,reverse columns")
+    parser.add_argument("--template", help="FASTA template for amplicon search (first record)")
+    parser.add_argument("-o", "--out", default="-", help="output CSV; default stdout")
+    parser.add_argument("--primer-nm", type=float, default=DEFAULT_PRIMER_NM)
+    parser.add_argument("--na-mm", type=float, default=DEFAULT_NA_MM)
+    parser.add_argument("--max-mismatches", type=int, default=0)
+    args = parser.parse_args()
+
+    template = None
+    if args.template:
+        with open(args.template, "rb") as f:
+            _, seq = next(iter_records(f), ("", b""))
+        template = seq.decode("ascii")
+    rows = screen_pairs(read_plate(args.plate), template, args.primer_nm, args.na_mm, args.max_mismatches)
+    own = args.out != "-"
+    out = open(args.out, "w", newline="", encoding="utf-8") if own else sys.stdout
+    try:
+        writer = csv.DictWriter(out, fieldnames=SCREEN_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    finally:
+        if own:
+            out.close()
+    print(f"Screened {len(rows):,} primer pair(s).", file=sys.stderr)
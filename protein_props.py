@@ -0,0 +1,97 @@
+import numpy as np
+
+# =========================
+# PROTEIN PROPERTIES
+# =========================
+# Every property is a dot product over one 20-entry residue-count vector
+# (built with a single bincount over the sequence bytes), so a capsid with
+# thousands of residues costs the same handful of array operations as a
+# peptide. The isoelectric point is found by bisection on the net charge.
+
+AMINO_ACIDS = "ACDEFGHIKLMNPQRSTVWY"
+
+_INDEX = np.full(256, -1, dtype=np.int16)
+for _i, _aa in enumerate(AMINO_ACIDS):
+    _INDEX[ord(_aa)] = _i
+
+# Average residue masses (Da, ExPASy), i.e. amino acid minus water
+RESIDUE_MASS = np.array([
+    71.0788, 103.1388, 115.0886, 129.1155, 147.1766, 57.0519, 137.1411, 113.1594, 128.1741, 113.1594,
+    131.1926, 114.1038, 97.1167, 128.1307, 156.1875, 87.0782, 101.1051, 99.1326, 186.2132, 163.1760,
+])
+WATER_MASS = 18.01524
+
+# Kyte-Doolittle hydropathy
+HYDROPATHY = np.array([
+    1.8, 2.5, -3.5, -3.5, 2.8, -0.4, -3.2, 4.5, -3.9, 3.8,
+    1.9, -3.5, -1.6, -3.5, -4.5, -0.8, -0.7, 4.2, -0.9, -1.3,
+])
+
+# Side-chain pKa values (EMBOSS) and the termini
+PKA_N_TERM, PKA_C_TERM = 8.6, 3.6
+_POSITIVE = {"H": 6.5, "K": 10.8, "R": 12.5}
+_NEGATIVE = {"C": 8.5, "D": 3.9, "E": 4.1, "Y": 10.1}
+POS_IDX = np.array([AMINO_ACIDS.index(a) for a in _POSITIVE])
+POS_PKA = np.array(list(_POSITIVE.values()))
+NEG_IDX = np.array([AMINO_ACIDS.index(a) for a in _NEGATIVE])
+NEG_PKA = np.array(list(_NEGATIVE.values()))
+
+# Molar extinction at 280 nm (Pace et al.): Trp, Tyr, and per cystine (Cys pair)
+EXT_TRP, EXT_TYR, EXT_CYSTINE = 5500, 1490, 125
+
+
+def residue_counts(sequences):
+    """20-entry count vector over one or more one-letter sequences (unknown letters ignored)."""
+    if isinstance(sequences, str):
+        sequences = [sequences]
+    data = np.frombuffer("".join(sequences).upper().encode("ascii", "replace"), dtype=np.uint8)
+    idx = _INDEX[data]
+    return np.bincount(idx[idx >= 0], minlength=len(AMINO_ACIDS))
+
+
+def net_charge(counts, ph, chains=1):
+    """Net charge at ``ph`` (scalar or array) for the given residue counts."""
+    ph = np.asarray(ph, dtype=float)[..., None]
+    positive = chains / (1 + 10 ** (ph[..., 0] - PKA_N_TERM)) + (counts[POS_IDX] / (1 + 10 ** (ph - POS_PKA))).sum(-1)
+    negative = chains / (1 + 10 ** (PKA_C_TERM - ph[..., 0])) + (counts[NEG_IDX] / (1 + 10 ** (NEG_PKA - ph))).sum(-1)
+    return positive - negative
+
+
+def isoelectric_point(counts, chains=1, tol=1e-3):
+    """pH of zero net charge, by bisection on [0, 14] (charge falls monotonically with pH)."""
+    lo, hi = 0.0, 14.0
+    while hi - lo > tol:
+        mid = (lo + hi) / 2
+        if net_charge(counts, mid, chains) > 0:
+            lo = mid
+        else:
+            hi = mid
+    return (lo + hi) / 2
+
+
+def protein_properties(sequences):
+    """MW, pI, extinction coefficients, GRAVY and composition for one or more chains."""
+    if isinstance(sequences, str):
+        sequences = [sequences]
+    sequences = [s for s in sequences if s]
+    counts = residue_counts(sequences)
+    total = int(counts.sum())
+    if not total:
+        return None
+    chains = len(sequences)
+    mw = float(counts @ RESIDUE_MASS) + WATER_MASS * chains
+    trp, tyr, cys = (int(counts[AMINO_ACIDS.index(a)]) for a in "WYC")
+    ext_reduced = trp * EXT_TRP + tyr * EXT_TYR
+    ext_oxidized = ext_reduced + (cys // 2) * EXT_CYSTINE
+    return {
+        "residues": total,
+        "chains": chains,
+        "molecular_weight": mw,
+        "isoelectric_point": isoelectric_point(counts, chains),
+        "extinction_reduced": ext_reduced,
+        "extinction_oxidized": ext_oxidized,
+        # Absorbance of a 1 mg/mL solution (1 cm path), cystines formed
+        "abs_0_1_percent": ext_oxidized / mw if mw else 0.0,
+        "gravy": float(counts @ HYDROPATHY) / total,
+        "composition": {aa: float(c) / total * 100 for aa, c in zip(AMINO_ACIDS, counts.tolist())},
+    }
@@ -0,0 +1,182 @@
+import itertools
+import re
+
+import numpy as np
+
+from text_match import AhoCorasick
+
+# =========================
+# RESTRICTION DIGEST ENGINE
+# =========================
+# Every recognition site of every enzyme (degenerate bases expanded, plus the
+# reverse complement of non-palindromic sites) goes into one Aho–Corasick
+# automaton, so a plasmid or BAC is scanned once for the whole enzyme table
+# instead of once per enzyme.
+
+DEFAULT_ENZYME_PATH = "rebase_enzymes.txt"
+
+IUPAC = {
+    "A": "A", "C": "C", "G": "G", "T": "T",
+    "R": "AG", "Y": "CT", "S": "CG", "W": "AT", "K": "GT", "M": "AC",
+    "B": "CGT", "D": "AGT", "H": "ACT", "V": "ACG", "N": "ACGT",
+}
+_IUPAC_COMPLEMENT = str.maketrans("ACGTRYSWKMBDHVN", "TGCAYRSWMKVHDBN")
+
+# Largest degenerate expansion we accept for one site (GCCNNNNNGGC = 4**5)
+MAX_EXPANSIONS = 4 ** 6
+
+_TYPE_IIS_RE = re.compile(r"^([A-Z]+)\((-?\d+)/(-?\d+)\)$")
+
+
+def iupac_reverse_complement(site):
+    return site.translate(_IUPAC_COMPLEMENT)[::-1]
+
+
+def expand_iupac(site):
+    """All concrete A/C/G/T strings matched by a degenerate site."""
+    choices = [IUPAC[b] for b in site]
+    if np.prod([len(c) for c in choices], dtype=np.int64) > MAX_EXPANSIONS:
+        raise ValueError(f"Site {site} is too degenerate to expand.")
+    return ["".join(p) for p in itertools.product(*choices)]
+
+
+class Enzyme:
+    """Recognition site with top/bottom cut offsets relative to the site start.
+
+    Offsets are in top-strand coordinates: for EcoRI (G^AATTC) the top strand is
+    cut after base 1 and the bottom strand after base 5.
+    """
+
+    def __init__(self, name, spec):
+        self.name = name
+        self.spec = spec
+        spec = spec.upper()
+        m = _TYPE_IIS_RE.match(spec)
+        if m:
+            self.site = m.group(1)
+            self.top_cut = len(self.site) + int(m.group(2))
+            self.bottom_cut = len(self.site) + int(m.group(3))
+        else:
+            if spec.count("^") > 1:
+                raise ValueError(f"{name}: more than one cut mark in {spec}")
+            self.site = spec.replace("^", "")
+            self.top_cut = spec.index("^") if "^" in spec else len(self.site)
+            self.bottom_cut = len(self.site) - self.top_cut
+        if not self.site or any(b not in IUPAC for b in self.site):
+            raise ValueError(f"{name}: invalid recognition site {spec}")
+        self.palindromic = iupac_reverse_complement(self.site) == self.site
+
+    def __repr__(self):
+        return f"Enzyme({self.name!r}, {self.spec!r})"
+
+    @property
+    def overhang(self):
+        """Positive = 5' overhang length, negative = 3' overhang, 0 = blunt."""
+        return self.bottom_cut - self.top_cut
+
+
+def load_enzymes(path=DEFAULT_ENZYME_PATH):
+    """Parse a REBASE bionet-style table ("Name  SITE" per line, "#" comments)."""
+    enzymes = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            parts = line.split()
+            if len(parts) < 2:
+                continue
+            enzymes.append(Enzyme(parts[0], parts[-1]))
+    return enzymes
+
+
+class DigestScanner:
+    """One automaton over the recognition sites of many enzymes."""
+
+    def __init__(self, enzymes):
+        self.enzymes = list(enzymes)
+        self.max_site = max((len(e.site) for e in self.enzymes), default=0)
+        self._automaton = AhoCorasick()
+        for i, enzyme in enumerate(self.enzymes):
+            for pattern in expand_iupac(enzyme.site):
+                self._automaton.add(pattern, (i, "+"))
+            if not enzyme.palindromic:
+                for pattern in expand_iupac(iupac_reverse_complement(enzyme.site)):
+                    self._automaton.add(pattern, (i, "-"))
+
+    def sites(self, seq, circular=False):
+        """{enzyme name: [(site start, strand, top-strand cut)]} with 0-based positions."""
+        n = len(seq)
+        text = seq + seq[:self.max_site - 1] if circular and n else seq
+        found = {e.name: [] for e in self.enzymes}
+        for start, end, (i, strand) in self._automaton.iter(text):
+            if start >= n:
+                continue
+            enzyme = self.enzymes[i]
+            length = end - start
+            if strand == "+":
+                cut = start + enzyme.top_cut
+            else:
+                # Site read on the bottom strand: its bottom-strand cut lands on the top strand
+                cut = start + length - enzyme.bottom_cut
+            if circular:
+                cut %= n
+            elif not 0 < cut < n:
+                # Type IIS cut falls outside a linear molecule
+                cut = None
+            found[enzyme.name].append((start, strand, cut))
+        for hits in found.values():
+            hits.sort()
+        return found
+
+
+def cut_positions(site_hits):
+    return sorted({cut for _, _, cut in site_hits if cut is not None})
+
+
+def fragments(cuts, length, circular=False):
+    """Fragment (start, end, size) list for top-strand cut positions (0-based)."""
+    cuts = sorted(set(cuts))
+    if not cuts:
+        return [(0, length, length)]
+    if circular:
+        if len(cuts) == 1:
+            return [(cuts[0], cuts[0] + length, length)]
+        frags = [(a, b, b - a) for a, b in zip(cuts, cuts[1:])]
+        frags.append((cuts[-1], cuts[0] + length, length - cuts[-1] + cuts[0]))
+        return frags
+    bounds = [0] + cuts + [length]
+    return [(a, b, b - a) for a, b in zip(bounds, bounds[1:]) if b > a]
+
+
+def digest(seq, scanner, names=None, circular=False):
+    """Single-enzyme digests plus the combined digest of the chosen enzymes.
+
+    The sequence is scanned once for every enzyme in ``scanner``; ``names``
+    selects which ones are reported and combined (default: all). Returns
+    ({name: {"enzyme", "sites", "cuts", "fragments"}}, combined fragments).
+    """
+    hits = scanner.sites(seq, circular=circular)
+    by_name = {e.name: e for e in scanner.enzymes}
+    results = {}
+    all_cuts = set()
+    for name in (names if names is not None else by_name):
+        cuts = cut_positions(hits[name])
+        all_cuts.update(cuts)
+        results[name] = {
+            "enzyme": by_name[name],
+            "sites": hits[name],
+            "cuts": cuts,
+            "fragments": fragments(cuts, len(seq), circular),
+        }
+    return results, fragments(all_cuts, len(seq), circular)
+
+
+# Common 1 kb DNA ladder (bp) for the virtual gel
+LADDER_1KB = [10000, 8000, 6000, 5000, 4000, 3000, 2000, 1500, 1000, 500, 250]
+
+
+def gel_migration(sizes, min_bp=100, max_bp=12000):
+    """Relative migration distance (0 = well, 1 = bottom) on a log-linear gel model."""
+    sizes = np.clip(np.asarray(sizes, dtype=float), min_bp, max_bp)
+    return (np.log10(max_bp) - np.log10(sizes)) / (np.log10(max_bp) - np.log10(min_bp))
@@ -0,0 +1,172 @@
+import math
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+# =========================
+# TEXTBOOK SEARCH INDEX
+# =========================
+# Inverted index over the knowledge base with BM25 ranking. Documents are added
+# and removed individually as rows change, so a query is a handful of dict
+# lookups instead of a scan over every row.
+
+TEXT_FIELDS = ["Topic", "Explanation", "Detailed_Explanation", "Ten_Points"]
+OCR_FIELD = "OCR"
+
+# Matches in the title count for more than matches deep in the notes
+FIELD_WEIGHTS = {
+    "Topic": 3.0,
+    "Explanation": 1.5,
+    "Detailed_Explanation": 1.0,
+    "Ten_Points": 1.0,
+    OCR_FIELD: 1.0,
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+
+def normalize(text):
+    """Lower-case and strip accents (e.g. "Mg²⁺" -> "mg2+", "5′" -> "5")."""
+    text = unicodedata.normalize("NFKD", str(text)).lower()
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+def _stem(token):
+    # Light plural folding so "enzymes" finds "enzyme" and "plasmids" finds "plasmid"
+    if token.endswith("'s"):
+        token = token[:-2]
+    if len(token) > 3 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 3 and token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        return token[:-1]
+    return token
+
+
+def tokenize(text):
+    if not text:
+        return []
+    return [_stem(t) for t in _TOKEN_RE.findall(normalize(text))]
+
+
+class SearchIndex:
+    """BM25-ranked inverted index: term -> {doc_id: (weighted tf, matched fields)}."""
+
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings = defaultdict(dict)
+        self._doc_len = {}
+        self._doc_terms = {}
+        self._total_len = 0.0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._doc_len)
+
+    def __contains__(self, doc_id):
+        return doc_id in self._doc_len
+
+    def add(self, doc_id, fields):
+        """Index (or re-index) one document given as {field name: text}."""
+        tf = defaultdict(float)
+        where = defaultdict(set)
+        length = 0.0
+        for field, text in fields.items():
+            weight = FIELD_WEIGHTS.get(field, 1.0)
+            for term in tokenize(text):
+                tf[term] += weight
+                where[term].add(field)
+                length += weight
+
+        with self._lock:
+            self._remove(doc_id)
+            for term, freq in tf.items():
+                self._postings[term][doc_id] = (freq, frozenset(where[term]))
+            self._doc_len[doc_id] = length
+            self._doc_terms[doc_id] = set(tf)
+            self._total_len += length
+
+    def remove(self, doc_id):
+        with self._lock:
+            self._remove(doc_id)
+
+    def _remove(self, doc_id):
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            docs = self._postings.get(term)
+            if docs is not None:
+                docs.pop(doc_id, None)
+                if not docs:
+                    del self._postings[term]
+        self._total_len -= self._doc_len.pop(doc_id)
+
+    def search(self, query, limit=None):
+        """Return [(doc_id, score, matched_fields)] ordered by descending BM25 score."""
+        terms = list(dict.fromkeys(tokenize(query)))
+        with self._lock:
+            n_docs = len(self._doc_len)
+            if not terms or not n_docs:
+                return []
+            avg_len = (self._total_len / n_docs) or 1.0
+            scores = defaultdict(float)
+            matched = defaultdict(set)
+            for term in terms:
+                docs = self._postings.get(term)
+                if not docs:
+                    continue
+                idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+                for doc_id, (freq, fields) in docs.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._doc_len[doc_id] / avg_len)
+                    scores[doc_id] += idf * freq * (self.k1 + 1) / (freq + norm)
+                    matched[doc_id].update(fields)
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [(doc_id, score, frozenset(matched[doc_id])) for doc_id, score in ranked]
+
+
+def as_text(value):
+    """Cell value as plain text; list cells (pre-split Ten_Points) are joined."""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return "\n".join(str(v) for v in value)
+    return ""
+
+
+def row_fields(row, ocr_text=""):
+    """Pick the searchable fields out of a knowledge-base row."""
+    fields = {}
+    for field in TEXT_FIELDS:
+        value = as_text(row.get(field))
+        if value:
+            fields[field] = value
+    if ocr_text:
+        fields[OCR_FIELD] = ocr_text
+    return fields
+
+
+# =========================
+# SUBSTRING FALLBACK
+# =========================
+# The index only answers whole (stemmed) terms. Mid-word queries such as
+# "merase" are answered by one vectorized str.contains over pre-lowered blobs
+# (one "search_blob" and one "ocr_blob" string per row, kept with the table).
+
+def substring_matches(blobs, query):
+    """Return (mask, source) for a raw substring query; source is "text", "ocr" or "both"."""
+    needle = normalize(query).strip()
+    if not needle:
+        empty = pd.Series(False, index=blobs.index)
+        return empty, pd.Series("", index=blobs.index)
+    in_text = blobs["search_blob"].str.contains(needle, regex=False)
+    in_ocr = blobs["ocr_blob"].str.contains(needle, regex=False)
+    source = np.select([in_text & in_ocr, in_text, in_ocr], ["both", "text", "ocr"], default="")
+    return in_text | in_ocr, pd.Series(source, index=blobs.index)
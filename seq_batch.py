@@ -0,0 +1,166 @@
+import argparse
+import csv
+import itertools
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from seq_core import SequenceProfile, find_orfs
+from seq_io import clean_dna, iter_records, transcribe
+
+# =========================
+# BATCH SEQUENCE ANALYSIS
+# =========================
+# The DNA Lab / Molecular Suite metrics as a batch API: feed it any iterable of
+# sequences (or a multi-FASTA/FASTQ file) and it streams one metrics row per
+# sequence, spreading the work over a process pool. Also usable from the shell:
+#
+#   python seq_batch.py primers.fasta -o metrics.csv --workers 8
+
+METRIC_FIELDS = [
+    "name", "length", "A", "C", "G", "T",
+    "gc_content", "molecular_weight", "longest_orf_aa", "mrna", "protein",
+]
+# Without the per-record mRNA / protein strings, e.g. for an on-screen table
+SCALAR_FIELDS = METRIC_FIELDS[:-2]
+
+
+def sequence_metrics(name, seq, min_orf_aa=30, sequences=True):
+    """One row of metrics for a single (raw or cleaned) DNA sequence.
+
+    ``sequences=False`` leaves out the mRNA and protein strings.
+    """
+    if isinstance(seq, bytes):
+        seq = seq.decode("ascii", "replace")
+    cleaned = clean_dna(seq)
+    profile = SequenceProfile(cleaned)
+    orfs = find_orfs(profile.codes, min_aa=min_orf_aa)
+    row = {
+        "name": name,
+        "length": profile.length,
+        **{base: profile.counts[base] for base in "ACGT"},
+        "gc_content": round(profile.gc_content, 3),
+        "molecular_weight": round(profile.molecular_weight, 1),
+        "longest_orf_aa": orfs[0]["Length (aa)"] if orfs else 0,
+    }
+    if sequences:
+        row["mrna"] = transcribe(cleaned)
+        row["protein"] = profile.translate()
+    return row
+
+
+def _metrics_batch(batch, min_orf_aa, sequences=True):
+    return [sequence_metrics(name, seq, min_orf_aa, sequences) for name, seq in batch]
+
+
+def _named(sequences):
+    for i, item in enumerate(sequences, 1):
+        if isinstance(item, tuple):
+            yield item
+        else:
+            yield f"seq_{i}", item
+
+
+def _batches(items, size):
+    while True:
+        batch = list(itertools.islice(items, size))
+        if not batch:
+            return
+        yield batch
+
+
+def iter_metrics(sequences, workers=1, batch_size=256, min_orf_aa=30, include_sequences=True):
+    """Yield metrics rows, in input order, for an iterable of sequences.
+
+    Items may be plain sequences or (name, sequence) pairs. With ``workers`` > 1
+    batches are processed in a process pool with a bounded number in flight, so
+    arbitrarily long inputs stream through with constant memory.
+    """
+    batches = _batches(_named(sequences), batch_size)
+    workers = workers or os.cpu_count()
+    if workers <= 1:
+        for batch in batches:
+            yield from _metrics_batch(batch, min_orf_aa, include_sequences)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = deque()
+        limit = 2 * workers
+        for batch in batches:
+            in_flight.append(pool.submit(_metrics_batch, batch, min_orf_aa, include_sequences))
+            if len(in_flight) >= limit:
+                yield from in_flight.popleft().result()
+        while in_flight:
+            yield from in_flight.popleft().result()
+
+
+def read_sequences(path, one_per_line=False):
+    """(name, sequence) pairs from a FASTA/FASTQ file (optionally gzipped) or a plain list."""
+    if one_per_line:
+        with open(path, encoding="utf-8") as f:
+            for i, line in enumerate((l.strip() for l in f if l.strip()), 1):
+                yield f"seq_{i}", line
+        return
+    with open(path, "rb") as f:
+        for i, (header, seq) in enumerate(iter_records(f), 1):
+            yield header or f"seq_{i}", seq
+
+
+def write_csv(rows, out, fields=METRIC_FIELDS):
+    """Stream rows to a CSV path or open text file; returns the row count."""
+    own = isinstance(out, (str, os.PathLike))
+    f = open(out, "w", newline="", encoding="utf-8") if own else out
+    try:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        count = 0
+        for count, row in enumerate(rows, 1):
+            writer.writerow(row)
+        return count
+    finally:
+        if own:
+            f.close()
+
+
+def write_parquet(rows, path, row_group_size=10_000):
+    """Stream rows to Parquet in row groups; returns the row count."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    count = 0
+    try:
+        for chunk in _batches(iter(rows), row_group_size):
+            table = pa.Table.from_pylist(chunk)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+            count += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-sequence metrics for many DNA sequences.")
+    parser.add_argument("input", help="FASTA/FASTQ file (plain or .gz), or a text file with --one-per-line")
+    parser.add_argument("-o", "--out", default="-", help="output path (.csv or .parquet); default: CSV on stdout")
+    parser.add_argument("--format", choices=["csv", "parquet"], default=None)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--min-orf-aa", type=int, default=30)
+    parser.add_argument("--one-per-line", action="store_true", help="treat each line of the input as one sequence")
+    args = parser.parse_args()
+
+    fmt = args.format or ("parquet" if args.out.endswith(".parquet") else "csv")
+    rows = iter_metrics(read_sequences(args.input, args.one_per_line), workers=args.workers,
+                        batch_size=args.batch_size, min_orf_aa=args.min_orf_aa)
+    if fmt == "parquet":
+        if args.out == "-":
+            parser.error("Parquet output needs a file path (-o).")
+        n = write_parquet(rows, args.out)
+    else:
+        n = write_csv(rows, sys.stdout if args.out == "-" else args.out)
+    print(f"Wrote metrics for {n:,} sequence(s).", file=sys.stderr)
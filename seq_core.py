@@ -0,0 +1,221 @@
+import numpy as np
+
+# =========================
+# NUMPY SEQUENCE CORE
+# =========================
+# A sequence is encoded once into a uint8 array (A=0, C=1, G=2, T=3, other=4)
+# and every metric below is a vectorized operation on that array, so the
+# Advanced Molecular Suite scales to chromosome-sized inputs.
+
+BASES = "ACGT"
+A, C, G, T, N = 0, 1, 2, 3, 4
+
+# Average nucleotide masses (Da) used by the Molecular Suite
+NUCLEOTIDE_MW = np.array([313.2, 289.2, 329.2, 304.2, 0.0])
+
+# Standard genetic code indexed by 16*b1 + 4*b2 + b3 with A,C,G,T = 0..3
+# ("_" marks stop codons)
+CODON_TABLE = np.frombuffer(
+    b"KNKNTTTTRSRSIIMI"
+    b"QHQHPPPPRRRRLLLL"
+    b"EDEDAAAAGGGGVVVV"
+    b"_Y_YSSSS_CWCLFLF",
+    dtype=np.uint8,
+)
+UNKNOWN_AA = ord("?")
+
+_ENCODE = np.full(256, N, dtype=np.uint8)
+for _code, _base in enumerate(BASES):
+    _ENCODE[ord(_base)] = _code
+    _ENCODE[ord(_base.lower())] = _code
+_ENCODE[ord("U")] = _ENCODE[ord("u")] = T
+
+_DECODE = np.frombuffer(b"ACGTN", dtype=np.uint8)
+# Complement in code space: A<->T, C<->G, N stays N
+_COMPLEMENT = np.array([T, G, C, A, N], dtype=np.uint8)
+
+
+def encode(seq):
+    """Encode a str/bytes sequence into the uint8 code array."""
+    if isinstance(seq, str):
+        seq = seq.encode("ascii", "replace")
+    return _ENCODE[np.frombuffer(seq, dtype=np.uint8)]
+
+
+def decode(codes):
+    return _DECODE[codes].tobytes().decode("ascii")
+
+
+def base_counts(codes):
+    """Counts of A, C, G, T and other symbols in one bincount pass."""
+    counts = np.bincount(codes, minlength=5)
+    return dict(zip("ACGTN", counts.tolist()))
+
+
+def complement(codes):
+    return _COMPLEMENT[codes]
+
+
+def reverse_complement(codes):
+    return _COMPLEMENT[codes[::-1]]
+
+
+def codon_index_track(codes):
+    """Table index of the codon starting at every position (sliding 2-bit window).
+
+    Entry i packs bases i, i+1, i+2 as (b1 << 4) | (b2 << 2) | b3, or -1 if any
+    of them is not A/C/G/T. All three frames are read from this single array by
+    striding, so no per-codon slicing happens anywhere.
+    """
+    if len(codes) < 3:
+        return np.empty(0, dtype=np.int16)
+    c = codes.astype(np.int16)
+    idx = (c[:-2] << 4) | (c[1:-1] << 2) | c[2:]
+    idx[(c[:-2] == N) | (c[1:-1] == N) | (c[2:] == N)] = -1
+    return idx
+
+
+def codon_indices(codes, frame=0):
+    """Per-codon table index for one frame, or -1 where the codon has a non-ACGT base."""
+    return codon_index_track(codes)[frame::3]
+
+
+def _amino_acids(idx):
+    return np.where(idx >= 0, CODON_TABLE[np.clip(idx, 0, 63)], UNKNOWN_AA).astype(np.uint8)
+
+
+def translate(codes, frame=0):
+    """Translate one reading frame; codons containing other symbols become "?"."""
+    return _amino_acids(codon_indices(codes, frame)).tobytes().decode("ascii")
+
+
+# =========================
+# SIX-FRAME TRANSLATION & ORFs
+# =========================
+
+_STOP = ord("_")
+_MET = ord("M")
+
+
+def six_frame_amino_acids(codes):
+    """{frame label: uint8 amino-acid array} for the three forward and three reverse frames."""
+    frames = {}
+    for strand, track in (("+", codon_index_track(codes)), ("-", codon_index_track(reverse_complement(codes)))):
+        for frame in range(3):
+            frames[f"{strand}{frame + 1}"] = _amino_acids(track[frame::3])
+    return frames
+
+
+def six_frame_translation(codes):
+    return {label: aa.tobytes().decode("ascii") for label, aa in six_frame_amino_acids(codes).items()}
+
+
+def find_orfs(codes, min_aa=30, include_partial=False):
+    """ATG..stop open reading frames in all six frames.
+
+    Returns a list of dicts with 1-based inclusive nucleotide coordinates on
+    the given (forward) strand; the stop codon is included in the span but not
+    in ``protein``. With ``include_partial`` an ORF still open at the end of
+    the sequence is reported too.
+    """
+    n = len(codes)
+    orfs = []
+    for label, aa in six_frame_amino_acids(codes).items():
+        frame = int(label[1]) - 1
+        stops = np.flatnonzero(aa == _STOP)
+        starts = np.flatnonzero(aa == _MET)
+        if include_partial:
+            stops = np.append(stops, len(aa))
+        if not len(stops) or not len(starts):
+            continue
+        # First ATG after the previous stop opens the ORF that this stop closes
+        prev = np.concatenate(([-1], stops[:-1]))
+        first = np.searchsorted(starts, prev + 1)
+        valid = first < len(starts)
+        orf_start = np.where(valid, starts[np.minimum(first, len(starts) - 1)], 0)
+        valid &= orf_start < stops
+        valid &= (stops - orf_start) >= min_aa
+        for aa_start, aa_stop in zip(orf_start[valid].tolist(), stops[valid].tolist()):
+            closed = aa_stop < len(aa)
+            nt_start = frame + 3 * aa_start
+            nt_end = frame + 3 * (aa_stop + 1 if closed else aa_stop)
+            if label[0] == "-":
+                nt_start, nt_end = n - nt_end, n - nt_start
+            orfs.append({
+                "Frame": label,
+                "Strand": label[0],
+                "Start": nt_start + 1,
+                "End": nt_end,
+                "Length (nt)": nt_end - nt_start,
+                "Length (aa)": aa_stop - aa_start,
+                "Complete": closed,
+                "Protein": aa[aa_start:aa_stop].tobytes().decode("ascii"),
+            })
+    orfs.sort(key=lambda orf: (-orf["Length (aa)"], orf["Start"]))
+    return orfs
+
+
+# =========================
+# SLIDING-WINDOW COMPOSITION
+# =========================
+
+def window_profile(codes, window, step=None):
+    """GC %, GC skew and AT skew in sliding windows via cumulative-sum differencing.
+
+    Each window is two lookups into per-base prefix sums, so the whole profile
+    is O(n) regardless of window size. Positions are 1-based window centres;
+    windows with no called bases report 0.
+    """
+    step = step or max(1, window // 2)
+    n = len(codes)
+    if window < 1 or n < window:
+        empty = np.empty(0)
+        return {"position": empty, "gc": empty, "gc_skew": empty, "at_skew": empty}
+    # Rows are indexed by base code (A..T = 0..3); N is never read
+    prefix = np.zeros((4, n + 1), dtype=np.int32 if n < 2**31 else np.int64)
+    for base in (A, C, G, T):
+        np.cumsum(codes == base, dtype=prefix.dtype, out=prefix[base, 1:])
+    starts = np.arange(0, n - window + 1, step)
+    a, c, g, t = (prefix[b, starts + window] - prefix[b, starts] for b in (A, C, G, T))
+    called = a + c + g + t
+
+    def ratio(num, den):
+        return np.divide(num, den, out=np.zeros(len(starts)), where=den > 0)
+
+    return {
+        "position": starts + (window + 1) / 2,
+        "gc": ratio((g + c) * 100.0, called),
+        "gc_skew": ratio((g - c).astype(float), g + c),
+        "at_skew": ratio((a - t).astype(float), a + t),
+    }
+
+
+class SequenceProfile:
+    """Encoded sequence plus the summary metrics shown in the Molecular Suite."""
+
+    def __init__(self, seq):
+        self.codes = seq if isinstance(seq, np.ndarray) else encode(seq)
+        counts = np.bincount(self.codes, minlength=5)
+        self.length = len(self.codes)
+        self.counts = dict(zip("ACGTN", counts.tolist()))
+        self.gc_count = int(counts[C] + counts[G])
+        self.gc_content = self.gc_count / self.length * 100 if self.length else 0.0
+        self.molecular_weight = float(counts @ NUCLEOTIDE_MW)
+
+    def complement(self):
+        return decode(complement(self.codes))
+
+    def reverse_complement(self):
+        return decode(reverse_complement(self.codes))
+
+    def translate(self, frame=0):
+        return translate(self.codes, frame)
+
+    def six_frames(self):
+        return six_frame_translation(self.codes)
+
+    def orfs(self, min_aa=30, include_partial=False):
+        return find_orfs(self.codes, min_aa=min_aa, include_partial=include_partial)
+
+    def windows(self, window, step=None):
+        return window_profile(self.codes, window, step)
@@ -0,0 +1,136 @@
+import gzip
+import io
+import zlib
+
+# =========================
+# SEQUENCE CLEANING
+# =========================
+# Cleaning works on bytes with a translation table: one C-level pass upper-cases
+# A/C/G/T and deletes everything else, instead of building a Python list with
+# one entry per character.
+
+_LOWER, _UPPER = b"acgt", b"ACGT"
+_UPPER_TABLE = bytes.maketrans(_LOWER, _UPPER)
+_NON_DNA = bytes(b for b in range(256) if b not in _LOWER + _UPPER)
+_TRANSCRIBE_TABLE = bytes.maketrans(b"T", b"U")
+
+GZIP_MAGIC = b"\x1f\x8b"
+CHUNK_SIZE = 1 << 20
+
+
+def clean_dna_bytes(data):
+    """Keep only A/C/G/T (upper-cased) from a bytes-like chunk."""
+    return bytes(data).translate(_UPPER_TABLE, _NON_DNA)
+
+
+def clean_dna(text):
+    """String version of clean_dna_bytes: "atgc 123 gtatc" -> "ATGCGTATC"."""
+    return clean_dna_bytes(text.encode("ascii", "ignore")).decode("ascii")
+
+
+def transcribe(seq):
+    """DNA -> mRNA (T -> U) on an already cleaned sequence (str or bytes)."""
+    if isinstance(seq, str):
+        return seq.encode("ascii").translate(_TRANSCRIBE_TABLE).decode("ascii")
+    return bytes(seq).translate(_TRANSCRIBE_TABLE)
+
+
+# =========================
+# FASTA / FASTQ STREAMING
+# =========================
+
+def open_sequence_stream(fileobj):
+    """Wrap a binary file object, transparently decompressing gzip input."""
+    if isinstance(fileobj, (bytes, bytearray)):
+        fileobj = io.BytesIO(fileobj)
+    stream = io.BufferedReader(fileobj, CHUNK_SIZE) if not hasattr(fileobj, "peek") else fileobj
+    if stream.peek(2)[:2] == GZIP_MAGIC:
+        stream = io.BufferedReader(gzip.GzipFile(fileobj=stream), CHUNK_SIZE)
+    return stream
+
+
+def _first_marker(stream):
+    head = stream.peek(CHUNK_SIZE).lstrip()
+    return head[:1]
+
+
+def iter_records(fileobj, keep_sequence=True):
+    """Yield (header, cleaned sequence bytes) for each FASTA or FASTQ record.
+
+    The format is detected from the first record marker (">" or "@"). Input is
+    read in bounded line chunks from a buffered (optionally gzipped) stream, so
+    only the current record is ever held in memory; with ``keep_sequence=False``
+    not even that, and the sequence is returned as its cleaned length instead.
+    Truncated or corrupt gzip input raises ValueError, like malformed records.
+    """
+    try:
+        stream = open_sequence_stream(fileobj)
+        marker = _first_marker(stream)
+        if marker == b"@":
+            yield from _iter_fastq(stream, keep_sequence)
+        else:
+            yield from _iter_fasta(stream, keep_sequence)
+    except (EOFError, gzip.BadGzipFile, zlib.error) as e:
+        raise ValueError(f"Corrupt or truncated gzip data: {e or type(e).__name__}") from e
+
+
+def _iter_fasta(stream, keep_sequence):
+    header = None
+    seq = bytearray()
+    length = 0
+    at_line_start = True
+    while True:
+        # Bounded reads: a genome written on one giant line still arrives in chunks
+        piece = stream.readline(CHUNK_SIZE)
+        if not piece:
+            break
+        if at_line_start and piece.startswith(b">"):
+            if header is not None:
+                yield header, (bytes(seq) if keep_sequence else length)
+            while not piece.endswith(b"\n"):
+                rest = stream.readline(CHUNK_SIZE)
+                if not rest:
+                    break
+                piece += rest
+            header = piece[1:].strip().decode("utf-8", "replace")
+            seq.clear()
+            length = 0
+            at_line_start = True
+            continue
+        if header is None:
+            # Bare sequence without a ">" line: treat the file as one record
+            header = ""
+        at_line_start = piece.endswith(b"\n")
+        chunk = clean_dna_bytes(piece)
+        length += len(chunk)
+        if keep_sequence:
+            seq += chunk
+    if header is not None:
+        yield header, (bytes(seq) if keep_sequence else length)
+
+
+def _iter_fastq(stream, keep_sequence):
+    lines = (line for line in stream if line.strip())
+    for title in lines:
+        if not title.startswith(b"@"):
+            raise ValueError("Malformed FASTQ: expected a line starting with '@'.")
+        seq_line = next(lines, None)
+        plus = next(lines, None)
+        qual = next(lines, None)
+        if seq_line is None or plus is None or qual is None or not plus.startswith(b"+"):
+            raise ValueError("Malformed FASTQ: truncated record.")
+        chunk = clean_dna_bytes(seq_line)
+        yield title[1:].strip().decode("utf-8", "replace"), (chunk if keep_sequence else len(chunk))
+
+
+def summarize_records(fileobj):
+    """[(header, length)] for every record without keeping any sequence."""
+    return list(iter_records(fileobj, keep_sequence=False))
+
+
+def read_record(fileobj, index):
+    """Return (header, sequence) of the index-th record, streaming past the others."""
+    for i, record in enumerate(iter_records(fileobj)):
+        if i == index:
+            return record
+    raise IndexError(index)
@@ -0,0 +1,486 @@
+import gzip
+import os
+import re
+import threading
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+# =========================
+# STRUCTURE STORE
+# =========================
+# PDB / mmCIF files are fetched once (or read from a local mirror), kept gzipped
+# under cache/structures and parsed once per process into a compact NumPy atom
+# table. The 3D viewer is handed a reduced model serialized from that table
+# (water, chain and level-of-detail selection happen here, not in the browser),
+# and the sidebar statistics come from the file itself.
+
+DEFAULT_CACHE_DIR = os.path.join("cache", "structures")
+RCSB_DOWNLOAD_URL = os.environ.get("RCSB_DOWNLOAD_URL", "https://files.rcsb.org/download")
+PDB_MIRROR_DIR = os.environ.get("PDB_MIRROR_DIR")
+
+# (connect, read) seconds; a ribosome mmCIF is tens of MB
+DOWNLOAD_TIMEOUT = (5, 60)
+
+_PDB_ID_RE = re.compile(r"^[0-9][A-Za-z0-9]{3}$")
+
+THREE_TO_ONE = {
+    "ALA": "A", "ARG": "R", "ASN": "N", "ASP": "D", "CYS": "C", "GLN": "Q", "GLU": "E",
+    "GLY": "G", "HIS": "H", "ILE": "I", "LEU": "L", "LYS": "K", "MET": "M", "PHE": "F",
+    "PRO": "P", "SER": "S", "THR": "T", "TRP": "W", "TYR": "Y", "VAL": "V",
+    "SEC": "U", "PYL": "O", "MSE": "M",
+    "DA": "A", "DC": "C", "DG": "G", "DT": "T", "A": "A", "C": "C", "G": "G", "U": "U",
+}
+
+
+class StructureNotFound(LookupError):
+    pass
+
+
+class StructureFetchError(IOError):
+    """The entry may exist, but RCSB could not be reached or sent a bad response."""
+
+
+def normalize_pdb_id(pdb_id):
+    pdb_id = (pdb_id or "").strip()
+    if not _PDB_ID_RE.match(pdb_id):
+        raise StructureNotFound(f"{pdb_id!r} is not a PDB ID (e.g. 1A8M).")
+    return pdb_id.upper()
+
+
+# =========================
+# PARSING
+# =========================
+
+ATOM_DTYPE = np.dtype([
+    ("hetatm", "?"),
+    ("name", "S4"),
+    ("resname", "S5"),
+    ("chain", "S4"),
+    ("resseq", "<i4"),
+    ("icode", "S1"),
+    ("element", "S2"),
+    ("xyz", "<f4", (3,)),
+])
+
+WATER_NAMES = (b"HOH", b"WAT", b"DOD")
+TRACE_ATOMS = (b"CA", b"P")
+
+# Above this many atoms the viewer gets a CA/P trace (then every k-th trace atom)
+# Serialized viewer models kept per structure (see Structure.model_text)
+MAX_CACHED_MODELS = 4
+DEFAULT_LOD_ATOMS = 60_000
+
+
+def atom_table(cols):
+    """Pack parsed atom columns into one ATOM_DTYPE array (about 40 bytes per atom)."""
+    table = np.empty(len(cols["name"]), dtype=ATOM_DTYPE)
+    for field in ("hetatm", "name", "resname", "chain", "resseq", "icode", "element"):
+        table[field] = cols[field]
+    table["xyz"] = np.column_stack([cols["x"], cols["y"], cols["z"]]) if len(table) else np.empty((0, 3))
+    return table
+
+
+def _text(value):
+    return value.decode("ascii", "replace") if isinstance(value, bytes) else str(value)
+
+
+class Structure:
+    """First model of a PDB/mmCIF entry: atom table plus entry-level statistics."""
+
+    def __init__(self, pdb_id, fmt, atoms, title, helix_ranges, sheet_ranges):
+        self.pdb_id = pdb_id
+        self.fmt = fmt
+        self.atoms = atoms
+        self.title = title
+        self.helix_ranges = helix_ranges
+        self.sheet_ranges = sheet_ranges
+        polymer = atoms[~atoms["hetatm"]]
+        keys = polymer[["chain", "resseq", "icode"]]
+        _, first = np.unique(keys, return_index=True)
+        self.residues = polymer[np.sort(first)]
+        _, first_chain = np.unique(self.residues["chain"], return_index=True)
+        self.chains = [_text(c) for c in self.residues["chain"][np.sort(first_chain)]]
+        self.residue_count = len(self.residues)
+        self.helix_fraction = self._fraction(helix_ranges)
+        self.sheet_fraction = self._fraction(sheet_ranges)
+        # Small LRU of serialized models: every chain / LOD choice is a full text copy
+        self._models = OrderedDict()
+        self._models_lock = threading.Lock()
+
+    def _fraction(self, ranges):
+        if not self.residue_count or not ranges:
+            return 0.0
+        covered = {(chain, num) for chain, lo, hi in ranges for num in range(lo, hi + 1)}
+        return sum((_text(c), int(r)) in covered
+                   for c, r in zip(self.residues["chain"], self.residues["resseq"])) / self.residue_count
+
+    def sequences(self):
+        """{chain: one-letter polymer sequence} in file order."""
+        seqs = {}
+        for chain, resname in zip(self.residues["chain"], self.residues["resname"]):
+            chain = _text(chain)
+            seqs[chain] = seqs.get(chain, "") + THREE_TO_ONE.get(_text(resname), "X")
+        return seqs
+
+    def protein_sequences(self):
+        """{chain: sequence} for amino-acid residues only (nucleic-acid chains are skipped)."""
+        seqs = {}
+        for chain, resname in zip(self.residues["chain"], self.residues["resname"]):
+            aa = THREE_TO_ONE.get(_text(resname))
+            if aa and len(_text(resname)) == 3:
+                chain = _text(chain)
+                seqs[chain] = seqs.get(chain, "") + aa
+        return seqs
+
+    def select(self, remove_water=False, chains=None, max_atoms=DEFAULT_LOD_ATOMS):
+        """Reduced atom table and a label for the level of detail applied.
+
+        Water and unwanted chains are dropped with boolean masks; if the rest is
+        still above ``max_atoms`` only CA/P trace atoms are kept, thinned to
+        every k-th atom if even the trace is too large.
+        """
+        atoms = self.atoms
+        mask = np.ones(len(atoms), dtype=bool)
+        if remove_water:
+            mask &= ~np.isin(atoms["resname"], WATER_NAMES)
+        if chains:
+            mask &= np.isin(atoms["chain"], [c.encode("ascii") for c in chains])
+        selected = atoms[mask]
+        detail = "all atoms"
+        if max_atoms and len(selected) > max_atoms:
+            selected = selected[~selected["hetatm"] & np.isin(selected["name"], TRACE_ATOMS)]
+            detail = "CA/P trace"
+            if len(selected) > max_atoms:
+                stride = -(-len(selected) // max_atoms)
+                selected = selected[::stride]
+                detail = f"CA/P trace, 1 in {stride} residues"
+        return selected, detail
+
+    def model_text(self, remove_water=False, chains=None, max_atoms=DEFAULT_LOD_ATOMS):
+        """(text, format, atom count, detail) of the reduced model for the viewer, memoized."""
+        key = (remove_water, tuple(chains or ()), max_atoms)
+        with self._models_lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                return self._models[key]
+        selected, detail = self.select(remove_water, chains, max_atoms)
+        if len(selected) < 100_000 and all(len(c) <= 1 for c in self.chains):
+            text, fmt = to_pdb(selected, self.helix_ranges, self.sheet_ranges), "pdb"
+        else:
+            text, fmt = to_mmcif(selected, self.pdb_id), "cif"
+        model = (text, fmt, len(selected), detail)
+        with self._models_lock:
+            self._models[key] = model
+            while len(self._models) > MAX_CACHED_MODELS:
+                self._models.popitem(last=False)
+        return model
+
+
+def to_pdb(atoms, helix_ranges=(), sheet_ranges=()):
+    """Minimal PDB text (HELIX/SHEET + ATOM/HETATM) for an atom table."""
+    lines = [
+        f"HELIX  {i:3d} {i:3d} UNK {c:1s} {lo:4d}  UNK {c:1s} {hi:4d}  1"
+        for i, (c, lo, hi) in enumerate(helix_ranges, 1)
+    ]
+    lines += [
+        f"SHEET  {i:3d} {'S':>3s} 1 UNK {c:1s}{lo:4d}  UNK {c:1s}{hi:4d}  0"
+        for i, (c, lo, hi) in enumerate(sheet_ranges, 1)
+    ]
+    xyz = atoms["xyz"]
+    for i, (het, name, resname, chain, resseq, icode, element) in enumerate(zip(
+            atoms["hetatm"], atoms["name"], atoms["resname"], atoms["chain"],
+            atoms["resseq"], atoms["icode"], atoms["element"])):
+        name, element = _text(name), _text(element)
+        # 4-character names start in column 13, shorter ones in column 14
+        name = name if len(name) == 4 else f" {name}"
+        x, y, z = xyz[i]
+        lines.append(
+            f"{'HETATM' if het else 'ATOM  '}{(i + 1) % 100000:5d} {name:<4s} {_text(resname):>3s} "
+            f"{_text(chain):1s}{int(resseq) % 10000:4d}{_text(icode):1s}   "
+            f"{x:8.3f}{y:8.3f}{z:8.3f}  1.00  0.00          {element:>2s}"
+        )
+    lines.append("END")
+    return "\n".join(lines)
+
+
+def to_mmcif(atoms, pdb_id="MODEL"):
+    """Minimal mmCIF _atom_site loop (for multi-letter chain IDs or >99,999 atoms)."""
+    lines = [f"data_{pdb_id or 'MODEL'}", "loop_"] + [f"_atom_site.{f}" for f in (
+        "group_PDB", "id", "type_symbol", "label_atom_id", "label_comp_id",
+        "label_asym_id", "label_seq_id", "auth_asym_id", "auth_seq_id", "Cartn_x", "Cartn_y", "Cartn_z",
+    )]
+    xyz = atoms["xyz"]
+    for i, (het, name, resname, chain, resseq, element) in enumerate(zip(
+            atoms["hetatm"], atoms["name"], atoms["resname"], atoms["chain"], atoms["resseq"], atoms["element"])):
+        name, chain = _text(name), _text(chain)
+        name = f'"{name}"' if "'" in name else name
+        x, y, z = xyz[i]
+        lines.append(
+            f"{'HETATM' if het else 'ATOM'} {i + 1} {_text(element) or '?'} {name} {_text(resname)} "
+            f"{chain} {resseq} {chain} {resseq} {x:.3f} {y:.3f} {z:.3f}"
+        )
+    return "\n".join(lines) + "\n#\n"
+
+
+def _new_atoms():
+    return {k: [] for k in ("hetatm", "name", "resname", "chain", "resseq", "icode", "element", "x", "y", "z")}
+
+
+def _seq_num(value):
+    try:
+        return int(value)
+    except ValueError:
+        return 0
+
+
+def parse_pdb(text, pdb_id=""):
+    atoms = _new_atoms()
+    helices, sheets = [], []
+    title = ""
+    for line in text.splitlines():
+        record = line[:6]
+        if record in ("ATOM  ", "HETATM"):
+            atoms["hetatm"].append(record == "HETATM")
+            atoms["name"].append(line[12:16].strip())
+            atoms["resname"].append(line[17:20].strip())
+            atoms["chain"].append(line[21:22].strip() or "A")
+            atoms["resseq"].append(_seq_num(line[22:26]))
+            atoms["icode"].append(line[26:27].strip())
+            atoms["x"].append(float(line[30:38]))
+            atoms["y"].append(float(line[38:46]))
+            atoms["z"].append(float(line[46:54]))
+            atoms["element"].append(line[76:78].strip() or line[12:14].strip().lstrip("0123456789")[:1])
+        elif record == "ENDMDL":
+            # Only the first model of NMR ensembles
+            break
+        elif record == "HELIX ":
+            helices.append((line[19:20].strip() or "A", _seq_num(line[21:25]), _seq_num(line[33:37])))
+        elif record == "SHEET ":
+            sheets.append((line[21:22].strip() or "A", _seq_num(line[22:26]), _seq_num(line[33:37])))
+        elif record == "HEADER" and not title:
+            title = line[10:50].strip().title()
+    return Structure(pdb_id, "pdb", atom_table(atoms), title, helices, sheets)
+
+
+_CIF_TOKEN_RE = re.compile(r"'(?:[^']|'(?!\s|$))*'|\"(?:[^\"]|\"(?!\s|$))*\"|\S+")
+
+
+def _cif_value(token):
+    if len(token) >= 2 and token[0] == token[-1] and token[0] in "'\"":
+        return token[1:-1]
+    return token
+
+
+def read_cif_categories(text, wanted):
+    """{category: {field: [values]}} for the requested mmCIF categories.
+
+    Handles both ``loop_`` tables and single-row key/value blocks, including
+    multi-line ``;`` text fields; everything else is skipped unparsed.
+    """
+    lines = text.splitlines()
+    out = {}
+    i, n = 0, len(lines)
+
+    def tokens_from(j):
+        # Tokens of line j, or the whole ;-delimited text field starting there
+        if lines[j].startswith(";"):
+            parts = [lines[j][1:]]
+            j += 1
+            while j < n and not lines[j].startswith(";"):
+                parts.append(lines[j])
+                j += 1
+            return ["\n".join(parts).strip()], j + 1
+        return [_cif_value(t) for t in _CIF_TOKEN_RE.findall(lines[j])], j + 1
+
+    while i < n:
+        line = lines[i]
+        if line.startswith("loop_"):
+            i += 1
+            fields = []
+            while i < n and lines[i].startswith("_"):
+                fields.append(lines[i].split()[0])
+                i += 1
+            category = fields[0].split(".", 1)[0] if fields else ""
+            keep = category in wanted
+            values = []
+            while i < n and not lines[i].startswith(("_", "loop_", "#", "data_")):
+                if not lines[i].strip():
+                    i += 1
+                    continue
+                toks, i = tokens_from(i)
+                if keep:
+                    values.extend(toks)
+            if keep:
+                cols = out.setdefault(category, {})
+                width = len(fields)
+                for k, field in enumerate(fields):
+                    cols[field.split(".", 1)[1]] = values[k::width]
+        elif line.startswith("_"):
+            parts = line.split(None, 1)
+            category, _, field = parts[0].partition(".")
+            if len(parts) > 1:
+                value = [_cif_value(t) for t in _CIF_TOKEN_RE.findall(parts[1])][:1]
+                i += 1
+            else:
+                value, i = tokens_from(i + 1)
+            if category in wanted and value:
+                out.setdefault(category, {})[field] = value
+        else:
+            i += 1
+    return out
+
+
+def parse_mmcif(text, pdb_id=""):
+    cats = read_cif_categories(text, {"_atom_site", "_struct_conf", "_struct_sheet_range", "_struct_keywords"})
+    site = cats.get("_atom_site", {})
+    count = len(site.get("group_PDB", []))
+    models = np.asarray(site.get("pdbx_PDB_model_num", []))
+    # Only the first model of NMR ensembles
+    keep = models == models[0] if len(models) == count and count else np.ones(count, dtype=bool)
+
+    def column(*names, default=""):
+        for name in names:
+            if name in site:
+                return np.asarray(site[name])[keep]
+        return np.full(int(keep.sum()), default)
+
+    icode = column("pdbx_PDB_ins_code", default="?")
+    atoms = {
+        "hetatm": column("group_PDB") == "HETATM",
+        "name": column("auth_atom_id", "label_atom_id"),
+        "resname": column("auth_comp_id", "label_comp_id"),
+        "chain": column("auth_asym_id", "label_asym_id"),
+        "resseq": [_seq_num(v) for v in column("auth_seq_id", "label_seq_id", default="0")],
+        "icode": np.where(np.isin(icode, ["?", "."]), "", icode),
+        "element": column("type_symbol"),
+        "x": column("Cartn_x", default="0").astype(np.float32),
+        "y": column("Cartn_y", default="0").astype(np.float32),
+        "z": column("Cartn_z", default="0").astype(np.float32),
+    }
+
+    def ranges(category, type_filter=None):
+        cols = cats.get(category, {})
+        chains = cols.get("beg_auth_asym_id", [])
+        types = cols.get("conf_type_id", [""] * len(chains))
+        return [
+            (c, _seq_num(b), _seq_num(e))
+            for c, b, e, t in zip(chains, cols.get("beg_auth_seq_id", []), cols.get("end_auth_seq_id", []), types)
+            if type_filter is None or t.startswith(type_filter)
+        ]
+
+    title = cats.get("_struct_keywords", {}).get("pdbx_keywords", [""])[0].title()
+    return Structure(pdb_id, "cif", atom_table(atoms), title,
+                     ranges("_struct_conf", "HELX"), ranges("_struct_sheet_range"))
+
+
+def parse_structure(text, fmt, pdb_id=""):
+    return parse_mmcif(text, pdb_id) if fmt == "cif" else parse_pdb(text, pdb_id)
+
+
+# =========================
+# FETCH + DISK CACHE
+# =========================
+
+class StructureStore:
+    """Fetch-once, gzip-on-disk, parse-once access to PDB entries."""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, mirror_dir=PDB_MIRROR_DIR,
+                 base_url=RCSB_DOWNLOAD_URL, max_parsed=8):
+        self.cache_dir = cache_dir
+        self.mirror_dir = mirror_dir
+        self.base_url = base_url.rstrip("/")
+        self.max_parsed = max_parsed
+        self._parsed = OrderedDict()
+        self._lock = threading.Lock()
+        self._session = None
+
+    def _cache_path(self, pdb_id, fmt):
+        return os.path.join(self.cache_dir, f"{pdb_id}.{fmt}.gz")
+
+    def _mirror_candidates(self, pdb_id):
+        low = pdb_id.lower()
+        mid = low[1:3]
+        for fmt, names in (("pdb", [f"{low}.pdb", f"pdb{low}.ent", f"{pdb_id}.pdb"]),
+                           ("cif", [f"{low}.cif", f"{pdb_id}.cif"])):
+            for name in names:
+                for folder in (self.mirror_dir, os.path.join(self.mirror_dir, mid)):
+                    for suffix in ("", ".gz"):
+                        yield fmt, os.path.join(folder, name + suffix)
+
+    def _download(self, pdb_id):
+        import requests
+
+        if self._session is None:
+            self._session = requests.Session()
+        # Legacy PDB format first (smaller); very large entries exist only as mmCIF
+        for fmt in ("pdb", "cif"):
+            try:
+                resp = self._session.get(f"{self.base_url}/{pdb_id}.{fmt}.gz", timeout=DOWNLOAD_TIMEOUT)
+                if resp.status_code == 404:
+                    continue
+                resp.raise_for_status()
+            except requests.RequestException as e:
+                raise StructureFetchError(f"Could not download {pdb_id} from RCSB: {e}") from e
+            return fmt, resp.content
+        raise StructureNotFound(f"PDB entry {pdb_id} was not found.")
+
+    def _store(self, pdb_id, fmt, gz_bytes):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._cache_path(pdb_id, fmt)
+        # Unique per thread too: two sessions may fetch the same ID at once
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(gz_bytes)
+            os.replace(tmp, path)
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def fetch_text(self, pdb_id):
+        """(format, text) from the disk cache, the local mirror or RCSB, in that order."""
+        pdb_id = normalize_pdb_id(pdb_id)
+        for fmt in ("pdb", "cif"):
+            path = self._cache_path(pdb_id, fmt)
+            if os.path.exists(path):
+                try:
+                    with gzip.open(path, "rt", encoding="utf-8", errors="replace") as f:
+                        return fmt, f.read()
+                except (OSError, EOFError, zlib.error):
+                    # Truncated or corrupt entry: drop it and fetch again
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+        if self.mirror_dir:
+            for fmt, path in self._mirror_candidates(pdb_id):
+                if os.path.exists(path):
+                    opener = gzip.open if path.endswith(".gz") else open
+                    with opener(path, "rt", encoding="utf-8", errors="replace") as f:
+                        return fmt, f.read()
+        fmt, gz_bytes = self._download(pdb_id)
+        try:
+            text = gzip.decompress(gz_bytes).decode("utf-8", "replace")
+        except (OSError, EOFError) as e:
+            raise StructureFetchError(f"RCSB sent a corrupt file for {pdb_id}: {e}") from e
+        # Only cached once it is known to decompress
+        self._store(pdb_id, fmt, gz_bytes)
+        return fmt, text
+
+    def load(self, pdb_id):
+        """Parsed Structure, memoized per process (a small LRU of recent entries)."""
+        pdb_id = normalize_pdb_id(pdb_id)
+        with self._lock:
+            if pdb_id in self._parsed:
+                self._parsed.move_to_end(pdb_id)
+                return self._parsed[pdb_id]
+        fmt, text = self.fetch_text(pdb_id)
+        structure = parse_structure(text, fmt, pdb_id)
+        with self._lock:
+            self._parsed[pdb_id] = structure
+            while len(self._parsed) > self.max_parsed:
+                self._parsed.popitem(last=False)
+        return structure
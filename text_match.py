@@ -0,0 +1,142 @@
+import os
+from collections import deque
+
+# =========================
+# MULTI-PATTERN MATCHING
+# =========================
+# Aho–Corasick automaton: all patterns are found in one left-to-right pass over
+# the text, so the cost of tagging a page no longer grows with the size of the
+# keyword vocabulary.
+
+
+class AhoCorasick:
+    """Find every occurrence of any of a set of patterns in a single pass."""
+
+    def __init__(self, patterns=()):
+        self._goto = [{}]
+        self._fail = [0]
+        # Patterns ending exactly at each node; _out adds those reachable by failure links
+        self._own = [[]]
+        self._out = [[]]
+        self._built = False
+        for pattern_id, pattern in enumerate(patterns):
+            self.add(pattern, pattern_id)
+
+    def add(self, pattern, value=None):
+        if not pattern:
+            return
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._own.append([])
+            node = nxt
+        self._own[node].append((len(pattern), pattern if value is None else value))
+        self._built = False
+
+    def _build(self):
+        # Outputs are rebuilt from each node's own patterns, so adding patterns
+        # after a search and rebuilding never duplicates inherited matches
+        self._out = [list(own) for own in self._own]
+        # Breadth-first so every node's failure link is final before its children's
+        queue = deque(self._goto[0].values())
+        for child in queue:
+            self._fail[child] = 0
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(ch, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+        self._built = True
+
+    def iter(self, text):
+        """Yield (start, end, value) for every match, in order of end position."""
+        if not self._built:
+            self._build()
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for length, value in out[node]:
+                yield i - length + 1, i + 1, value
+
+
+# =========================
+# KEYWORD TAGGER
+# =========================
+# Vocabulary file format: one term per line, "#" starts a comment. A line may
+# give a display label after "|", e.g. "deoxyribonucleic acid | DNA".
+
+DEFAULT_VOCABULARY_PATH = "bio_keywords.txt"
+
+# Allow simple plurals after a whole-word match ("enzyme" tags "enzymes")
+_PLURAL_SUFFIXES = ("s", "es")
+
+
+def load_vocabulary(path=DEFAULT_VOCABULARY_PATH):
+    """Return [(term, label)] from a vocabulary file (empty if it is missing)."""
+    if not os.path.exists(path):
+        return []
+    vocab = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            term, _, label = line.partition("|")
+            term, label = term.strip(), label.strip()
+            if term:
+                vocab.append((term, label or term))
+    return vocab
+
+
+def _is_word_char(ch):
+    return ch.isalnum()
+
+
+class KeywordTagger:
+    """Whole-word, case-insensitive keyword tagging backed by one automaton."""
+
+    def __init__(self, vocabulary):
+        self.labels = []
+        self._order = {}
+        self._automaton = AhoCorasick()
+        for term, label in vocabulary:
+            if label not in self._order:
+                self._order[label] = len(self.labels)
+                self.labels.append(label)
+            self._automaton.add(term.lower(), label)
+
+    @classmethod
+    def from_file(cls, path=DEFAULT_VOCABULARY_PATH):
+        return cls(load_vocabulary(path))
+
+    def tags(self, text):
+        """Labels found in ``text``, in vocabulary order."""
+        if not text:
+            return []
+        text = text.lower()
+        n = len(text)
+        found = set()
+        for start, end, label in self._automaton.iter(text):
+            if label in found:
+                continue
+            if start > 0 and _is_word_char(text[start - 1]):
+                continue
+            if end < n and _is_word_char(text[end]):
+                suffix = next((s for s in _PLURAL_SUFFIXES
+                               if text.startswith(s, end) and (end + len(s) == n or not _is_word_char(text[end + len(s)]))), None)
+                if suffix is None:
+                    continue
+            found.add(label)
+        return sorted(found, key=self._order.__getitem__)
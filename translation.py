@@ -0,0 +1,195 @@
+import argparse
+import json
+import os
+import re
+import threading
+
+# =========================
+# SEGMENT-CACHED TRANSLATION
+# =========================
+# Text is split into sentence segments; each distinct segment is translated
+# once and kept in a persistent JSON store, so re-translating a chapter only
+# sends the sentences that changed. Misses are packed one per line into as few
+# provider requests as the size limit allows, and the output is reassembled
+# in the original order with the original whitespace.
+
+DEFAULT_STORE_PATH = "cache/translations.json"
+
+# deep-translator's Google backend rejects payloads of 5000 characters or more
+MAX_REQUEST_CHARS = 4500
+
+# Sentence ends (., !, ? or the Hindi danda) followed by spaces, or line breaks
+_SEGMENT_SPLIT_RE = re.compile(r"((?<=[.!?।])[ \t]+|\s*\n\s*)")
+
+# Knowledge-base columns translated by the offline pass
+KB_COLUMNS = ["Topic", "Explanation", "Ten_Points", "Detailed_Explanation"]
+HINDI_PREFIX = "Hindi_"
+
+
+def split_segments(text):
+    """[(segment, trailing separator)] such that joining them restores ``text``."""
+    parts = _SEGMENT_SPLIT_RE.split(text)
+    return [(parts[i], parts[i + 1] if i + 1 < len(parts) else "") for i in range(0, len(parts), 2)]
+
+
+def split_long(segment, max_chars):
+    """Pieces of at most ``max_chars``, cut after the last sentence / clause end, else whitespace."""
+    pieces = []
+    while len(segment) > max_chars:
+        window = segment[:max_chars]
+        cut = max((window.rfind(p) + 1 for p in ".!?।;:,"), default=0)
+        if cut < max_chars // 2:
+            cut = window.rfind(" ") + 1 or max_chars
+        pieces.append(segment[:cut].strip())
+        segment = segment[cut:].lstrip()
+    return [p for p in pieces + [segment] if p]
+
+
+def _batches(segments, max_chars):
+    batch, size = [], 0
+    for seg in segments:
+        if batch and size + len(seg) + 1 > max_chars:
+            yield batch
+            batch, size = [], 0
+        batch.append(seg)
+        size += len(seg) + 1
+    if batch:
+        yield batch
+
+
+class SegmentStore:
+    """JSON-backed map of (language pair, source segment) -> translation."""
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = self._read()
+
+    def _read(self):
+        if not self.path:
+            return {}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, pair, segment):
+        return self._entries.get(pair, {}).get(segment)
+
+    def put_many(self, pair, translations):
+        with self._lock:
+            self._entries.setdefault(pair, {}).update(translations)
+            self._save()
+
+    def _save(self):
+        if not self.path:
+            return
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+
+class TranslationService:
+    """Translate text through a segment cache, batching only the misses."""
+
+    def __init__(self, target="hi", source="auto", store=None, translator=None, max_chars=MAX_REQUEST_CHARS):
+        self.target = target
+        self.source = source
+        self.pair = f"{source}>{target}"
+        self.store = store if store is not None else SegmentStore()
+        self.max_chars = max_chars
+        self._translator = translator
+
+    @property
+    def translator(self):
+        if self._translator is None:
+            from deep_translator import GoogleTranslator
+
+            self._translator = GoogleTranslator(source=self.source, target=self.target)
+        return self._translator
+
+    def _translate_batch(self, batch):
+        # One request per batch; if the provider merges or splits lines we
+        # cannot realign them, so fall back to one request per segment
+        if len(batch) > 1:
+            out = (self.translator.translate("\n".join(batch)) or "").split("\n")
+            if len(out) == len(batch):
+                return [t.strip() for t in out]
+        return [(self.translator.translate(seg) or seg).strip() for seg in batch]
+
+    def translate_missing(self, segments):
+        """Translate and store the distinct segments not in the cache; returns how many were sent."""
+        missing = list(dict.fromkeys(
+            s for s in segments if s.strip() and self.store.get(self.pair, s) is None
+        ))
+        # A segment over the request limit is translated in pieces and stored whole
+        for seg in [s for s in missing if len(s) > self.max_chars]:
+            pieces = split_long(seg, self.max_chars)
+            out = [t for batch in _batches(pieces, self.max_chars) for t in self._translate_batch(batch)]
+            self.store.put_many(self.pair, {seg: " ".join(out)})
+        for batch in _batches([s for s in missing if len(s) <= self.max_chars], self.max_chars):
+            self.store.put_many(self.pair, dict(zip(batch, self._translate_batch(batch))))
+        return len(missing)
+
+    def translate(self, text):
+        if not text or not text.strip():
+            return text
+        parts = split_segments(text)
+        self.translate_missing([seg for seg, _ in parts])
+        return "".join(
+            (self.store.get(self.pair, seg) if seg.strip() else seg) + sep
+            for seg, sep in parts
+        )
+
+
+def translated_path(csv_path, target):
+    """``knowledge_base.csv`` -> ``knowledge_base.hi.csv``."""
+    root, ext = os.path.splitext(csv_path)
+    return f"{root}.{target}{ext or '.csv'}"
+
+
+def translate_knowledge_base(csv_path, service, columns=KB_COLUMNS, out_path=None):
+    """Write the knowledge base plus ``Hindi_<column>`` columns to a sibling CSV.
+
+    All segments of all rows are collected first, so the whole sheet costs one
+    batched pass over the cache misses. The output defaults to
+    ``<name>.<lang>.csv``: the watched source is never rewritten implicitly.
+    Returns (segments sent, output path).
+    """
+    import pandas as pd
+
+    df = pd.read_csv(csv_path, dtype=str, keep_default_na=False, encoding="utf-8-sig")
+    df.columns = df.columns.str.strip()
+    df = df.rename(columns={"10_Points": "Ten_Points"})
+    columns = [c for c in columns if c in df.columns]
+    sent = service.translate_missing(
+        [seg for col in columns for text in df[col] for seg, _ in split_segments(text)]
+    )
+    for col in columns:
+        df[f"{HINDI_PREFIX}{col}"] = df[col].map(service.translate)
+    out_path = out_path or translated_path(csv_path, service.target)
+    df.to_csv(out_path, index=False, encoding="utf-8-sig")
+    return sent, out_path
+
+
+if __name__ == "__main__":
+    from knowledge_store import find_source
+
+    parser = argparse.ArgumentParser(description="Pre-translate the knowledge base into Hindi_* columns.")
+    parser.add_argument("csv", nargs="?", default=None)
+    parser.add_argument("--out", default=None, help="output CSV (default: <input>.<target>.csv next to the input)")
+    parser.add_argument("--target", default="hi")
+    parser.add_argument("--store", default=DEFAULT_STORE_PATH)
+    args = parser.parse_args()
+    source = args.csv or find_source()
+    if source is None:
+        raise SystemExit("No knowledge base CSV found.")
+    n, out = translate_knowledge_base(source, TranslationService(target=args.target, store=SegmentStore(args.store)),
+                                      out_path=args.out)
+    print(f"Translated {n:,} new segment(s); wrote {out}")
@@ -0,0 +1,71 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# =========================
+# UNIFIED FAN-OUT SEARCH
+# =========================
+# One query goes to every source at once: the local textbook index, Wikipedia
+# and each NCBI database. The clients are blocking (requests), so each runs in
+# a worker thread under its own asyncio deadline; results are handed back as
+# they complete, and total latency is that of the slowest source that answers
+# in time rather than the sum of all of them.
+
+DEFAULT_DEADLINES = {"textbook": 1.0, "wikipedia": 6.0, "ncbi": 8.0}
+NCBI_DATABASES = ("pubmed", "gene", "protein")
+
+# Long-lived pool rather than the loop's default executor: asyncio.run() joins
+# the default executor on exit, which would make a timed-out source block again
+_EXECUTOR = ThreadPoolExecutor(max_workers=16, thread_name_prefix="fan-out")
+
+
+async def _run_source(name, func, deadline):
+    start = time.perf_counter()
+    value, error, status = None, None, "ok"
+    try:
+        # A source that misses its deadline keeps running in its thread and
+        # still fills its cache for the next query; we just stop waiting
+        loop = asyncio.get_running_loop()
+        value = await asyncio.wait_for(loop.run_in_executor(_EXECUTOR, func), timeout=deadline)
+    except asyncio.TimeoutError:
+        status, error = "timeout", f"no answer within {deadline:g} s"
+    except Exception as e:
+        status, error = "error", str(e)
+    return {"source": name, "status": status, "value": value, "error": error,
+            "elapsed": time.perf_counter() - start}
+
+
+async def search_all(sources, on_result=None):
+    """Run ``{name: (func, deadline)}`` concurrently; call ``on_result`` as each finishes."""
+    tasks = [asyncio.create_task(_run_source(name, func, deadline))
+             for name, (func, deadline) in sources.items()]
+    results = {}
+    for next_done in asyncio.as_completed(tasks):
+        result = await next_done
+        results[result["source"]] = result
+        if on_result is not None:
+            on_result(result)
+    return results
+
+
+def fan_out(sources, on_result=None):
+    """Blocking entry point for scripts (e.g. a Streamlit rerun) without a running loop."""
+    return asyncio.run(search_all(sources, on_result))
+
+
+def build_sources(query, kb=None, wiki=None, ncbi=None, databases=NCBI_DATABASES, deadlines=None):
+    """Source table for ``fan_out``; sources whose client is None are skipped."""
+    deadlines = {**DEFAULT_DEADLINES, **(deadlines or {})}
+    sources = {}
+    if kb is not None:
+        def textbook():
+            df, hits = kb.search_rows(query)
+            return [(pos, df.iloc[pos].get("Topic", "Untitled"), ocr_match, text_match)
+                    for pos, ocr_match, text_match in hits]
+        sources["textbook"] = (textbook, deadlines["textbook"])
+    if wiki is not None:
+        sources["wikipedia"] = (lambda: wiki.summary(query), deadlines["wikipedia"])
+    if ncbi is not None:
+        for db in databases:
+            sources[f"ncbi:{db}"] = (lambda db=db: ncbi.search(db, query, retmax=5), deadlines["ncbi"])
+    return sources